@@ -5,37 +5,33 @@ import os
 import base64
 from datetime import datetime, timedelta
 import json
-import plotly.express as px
-import plotly.graph_objects as go
 
 
 from database import (
     initialize_database,
     get_or_create_user,
-    save_income,
-    save_expenses,
-    save_assets,
-    save_liabilities,
-    save_financial_goals,
-    save_investment_portfolio,
+    save_all,
     save_ai_insight,
-    get_user_income,
-    get_user_expenses,
-    get_user_assets,
-    get_user_liabilities,
-    get_user_financial_goals,
-    get_user_portfolio,
+    get_user_data,
     get_user_insights
 )
 
 
-def apply_custom_style():
-    image_path = "C:\\Users\\USER\\Downloads\\Group 1.png"
+BACKGROUND_IMAGE_PATH = "C:\\Users\\USER\\Downloads\\Group 1.png"
 
-    
-    if not os.path.exists(image_path):
-        st.error(f"Background image not found at {image_path}")
-        return
+# Rows of the dashboard's financial summary table
+_METRICS = ("Net Worth", "Monthly Income", "Monthly Expenses", "Monthly Savings")
+
+# Chat messages shown on the advisor page; older ones stay in session state
+CHAT_HISTORY_VISIBLE_ROWS = 50
+CHAT_COLUMNS = ["Role", "Content", "Timestamp"]
+
+
+@st.cache_resource
+def _load_custom_css(image_path, modified_time):
+    """Read and base64-encode the background image once per file version and build the style block."""
+    if modified_time is None:
+        return None
 
     with open(image_path, "rb") as f:
         background_image = base64.b64encode(f.read()).decode("utf-8")
@@ -61,46 +57,52 @@ def apply_custom_style():
     }}
     """
 
-    st.markdown(f"""
+    return f"""
     <style>
     {css_content}
     </style>
-    """, unsafe_allow_html=True)
+    """
+
 
+def apply_custom_style():
+    # The modification time is part of the cache key, so replacing the image takes effect without a restart
+    modified_time = os.path.getmtime(BACKGROUND_IMAGE_PATH) if os.path.exists(BACKGROUND_IMAGE_PATH) else None
+    css = _load_custom_css(BACKGROUND_IMAGE_PATH, modified_time)
+    if css is None:
+        st.error(f"Background image not found at {BACKGROUND_IMAGE_PATH}")
+        return
 
-initialize_database()
-from geminiai_use import (
-    generate_financial_adivice,
-    investement_advise,
-    analyze_budget,
+    st.markdown(css, unsafe_allow_html=True)
 
-)
+
+@st.cache_resource(show_spinner=False)
+def _init_database():
+    """Create the database schema once per server process, not on every rerun."""
+    initialize_database()
+    return True
+
+
+_init_database()
+
+
+# geminiai_use (Gemini client) and moneyanalyser (yfinance) are imported
+# inside the pages that use them, so other pages don't pay for loading them
 from data_processing import (
     format_currency,
     calculate_budget_summary,
-    calculate_investment_returns,
-    calculate_loan_payment,
-    generate_amortization_schedule,
-    categorize_expenses,
-
 )
 from frontend import (
     create_expense_pie_chart,
     create_income_expense_bar_chart,
-    create_investment_growth_chart,
-    create_expense_trend_chart,
-    create_savings_goal_progress_chart
-)
-from moneyanalyser import (
-    calculate_net_worth,
-    calculate_emergency_fund_ratio,
-    calculate_portfolio_metrics,
-    calculate_debt_to_income_ratio,
-    analyze_retirement_readiness,
-    analyze_mortgage_affordability,
 )
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_all(user_id):
+    """Load a user's saved financial data, cached so logging in again skips the database."""
+    return get_user_data(user_id)
+
+
 st.set_page_config(
     page_title="Artha - AI-Powered Financial Assistant",
     page_icon="💰",
@@ -122,6 +124,8 @@ if 'financial_goals' not in st.session_state:
     st.session_state.financial_goals = []
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'chat_df' not in st.session_state:
+    st.session_state.chat_df = pd.DataFrame(columns=CHAT_COLUMNS)
 if 'portfolio' not in st.session_state:
     st.session_state.portfolio = []
 if 'user_id' not in st.session_state:
@@ -136,46 +140,61 @@ st.markdown('<h1 class="gradient-text">Artha</h1><h1>: Your AI Financial Assista
 st.markdown('<p style="font-size: 1.2em; font-style: italic;">Make smarter financial decisions with AI-powered insights</p>', unsafe_allow_html=True)
 
 
+# Login and Register run as button callbacks, which Streamlit calls before the
+# rerun the click triggers, so that same run already renders the main app
+def login_user():
+    """Log in the user named in the login form and load their saved data."""
+    username = st.session_state.login_username
+    if not username:
+        st.session_state.auth_error = "Please enter a username"
+        return
+
+    user_id = get_or_create_user(username)
+    st.session_state.user_id = user_id
+    st.session_state.username = username
+    st.session_state.authenticated = True
+
+    user_data = _load_all(user_id)
+    st.session_state.income = user_data["income"]
+    st.session_state.expenses = user_data["expenses"]
+    st.session_state.assets = user_data["assets"]
+    st.session_state.liabilities = user_data["liabilities"]
+    st.session_state.financial_goals = user_data["financial_goals"]
+    st.session_state.portfolio = user_data["portfolio"]
+
+    st.session_state.auth_message = f"Welcome back, {username}!"
+
+
+def register_user():
+    """Register the user named in the registration form."""
+    username = st.session_state.register_username
+    if not username:
+        st.session_state.auth_error = "Please enter a username"
+        return
+
+    user_id = get_or_create_user(username, st.session_state.register_email)
+    st.session_state.user_id = user_id
+    st.session_state.username = username
+    st.session_state.authenticated = True
+
+    st.session_state.auth_message = f"Welcome, {username}!"
+
+
 if not st.session_state.authenticated:
     st.sidebar.title("User Authentication")
     auth_option = st.sidebar.radio("Choose an option:", ["Login", "Register"])
 
     if auth_option == "Login":
-        username = st.sidebar.text_input("Username")
-        if st.sidebar.button("Login"):
-            if username:
-                user_id = get_or_create_user(username)
-                st.session_state.user_id = user_id
-                st.session_state.username = username
-                st.session_state.authenticated = True
-
-                
-                st.session_state.income = get_user_income(user_id)
-                st.session_state.expenses = get_user_expenses(user_id)
-                st.session_state.assets = get_user_assets(user_id)
-                st.session_state.liabilities = get_user_liabilities(user_id)
-                st.session_state.financial_goals = get_user_financial_goals(user_id)
-                st.session_state.portfolio = get_user_portfolio(user_id)
-
-                st.sidebar.success(f"Welcome back, {username}!")
-                st.rerun()
-            else:
-                st.sidebar.error("Please enter a username")
+        st.sidebar.text_input("Username", key="login_username")
+        st.sidebar.button("Login", on_click=login_user)
 
     elif auth_option == "Register":
-        username = st.sidebar.text_input("Username")
-        email = st.sidebar.text_input("Email (optional)")
-
-        if st.sidebar.button("Register"):
-            if username:
-                user_id = get_or_create_user(username, email)
-                st.session_state.user_id = user_id
-                st.session_state.username = username
-                st.session_state.authenticated = True
-                st.sidebar.success(f"Welcome, {username}!")
-                st.rerun()
-            else:
-                st.sidebar.error("Please enter a username")
+        st.sidebar.text_input("Username", key="register_username")
+        st.sidebar.text_input("Email (optional)", key="register_email")
+        st.sidebar.button("Register", on_click=register_user)
+
+    if "auth_error" in st.session_state:
+        st.sidebar.error(st.session_state.pop("auth_error"))
 
     
     st.info("Please login or register to access all features.")
@@ -196,6 +215,8 @@ if not st.session_state.authenticated:
 
 
 st.sidebar.title(f"Welcome, {st.session_state.username}")
+if "auth_message" in st.session_state:
+    st.sidebar.success(st.session_state.pop("auth_message"))
 st.sidebar.title("Navigation")
 page = st.sidebar.radio(
     "Select a section:",
@@ -206,87 +227,67 @@ page = st.sidebar.radio(
 if st.sidebar.button("Save Data"):
     with st.spinner("Saving your data..."):
         
-        save_income(st.session_state.user_id, st.session_state.income)
-        save_expenses(st.session_state.user_id, st.session_state.expenses)
-        save_assets(st.session_state.user_id, st.session_state.assets)
-        save_liabilities(st.session_state.user_id, st.session_state.liabilities)
+        payload = {
+            "income": st.session_state.income,
+            "expenses": st.session_state.expenses,
+            "assets": st.session_state.assets,
+            "liabilities": st.session_state.liabilities
+        }
 
         if st.session_state.values:
-            save_financial_goals(st.session_state.user_id, st.session_state.financial_goals)
+            payload["financial_goals"] = st.session_state.financial_goals
 
         if st.session_state.portfolio:
-            save_investment_portfolio(st.session_state.user_id, st.session_state.portfolio)
+            payload["portfolio"] = st.session_state.portfolio
+
+        save_all(st.session_state.user_id, payload)
+
+        # Saved data must be reloaded from the database on the next login
+        _load_all.clear()
 
         st.sidebar.success("Data saved successfully!")
 
 
-def display_ai_advice(title, advice_text):
-    st.markdown(f"### {title}")
-    st.markdown("""
+@st.cache_data(max_entries=64, show_spinner=False)
+def _advice_html(advice_text):
+    """Render advice text as the HTML card, once per distinct advice text."""
+    return """
     <div style="background-color:#f0f2f6; padding:15px; border-radius:5px; border-left:4px solid #4169E1;">
     <h4 style="margin-top:0;">AI-Generated Advice</h4>
     {advice}
     </div>
-    """.format(advice=advice_text.replace('\n', '<br>')), unsafe_allow_html=True)
-
-# Dashboard
-if page == "Dashboard":
-    st.header("Financial Dashboard")
+    """.format(advice=advice_text.replace('\n', '<br>'))
 
-    
-    col1, col2 = st.columns(2)
 
-    with col1:
-        st.subheader("Financial Summary")
+def display_ai_advice(title, advice_text):
+    st.markdown(f"### {title}")
+    st.markdown(_advice_html(advice_text), unsafe_allow_html=True)
 
-        # Net Worth Calculation
-        net_worth, total_assets, total_liabilities = calculate_net_worth(
-            st.session_state.assets,
-            st.session_state.liabilities
-        )
 
-        # Display key metrics
-        st.metric("Net Worth", format_currency(net_worth))
+@st.cache_data(show_spinner=False)
+def _cached_expense_pie_chart(expense_items):
+    """Build the expense pie chart once per distinct (category, amount) tuple."""
+    return create_expense_pie_chart(dict(expense_items))
 
-        # Income and Expenses
-        if st.session_state.expenses:
-            total_expenses = sum(st.session_state.expenses.values())
-            st.metric("Monthly Income", format_currency(st.session_state.income))
-            st.metric("Monthly Expenses", format_currency(total_expenses))
-            savings = st.session_state.income - total_expenses
-            st.metric("Monthly Savings", format_currency(savings))
 
-        
-        if st.session_state.expenses and 'Emergency Fund' in st.session_state.assets:
-            monthly_expenses = sum(st.session_state.expenses.values())
-            emergency_fund = st.session_state.assets.get('Emergency Fund', 0)
-            months_covered = calculate_emergency_fund_ratio(emergency_fund, monthly_expenses)
-            if months_covered is not None:
-                st.metric("Emergency Fund Coverage", f"{months_covered:.1f} months")
+@st.cache_data(show_spinner=False)
+def _cached_income_expense_bar_chart(income, total_expenses, remaining):
+    """Build the income vs expenses bar chart once per distinct set of totals."""
+    return create_income_expense_bar_chart(income, total_expenses, remaining)
 
-        
-        financial_data = {
-            "Metric": ["Net Worth", "Monthly Income", "Monthly Expenses", "Monthly Savings"],
-            "Amount": [net_worth, st.session_state.income, total_expenses, savings]
-        }
-        df_financial_data = pd.DataFrame(financial_data)
-        st.table(df_financial_data)
 
-    with col2:
-        
-        if st.session_state.expenses:
-            st.subheader("Expense Breakdown")
-            fig = create_expense_pie_chart(st.session_state.expenses)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Add your expenses in the Budget Analyzer to see a breakdown.")
+@st.cache_data(show_spinner=False)
+def _cached_financial_summary(net_worth, income, total_expenses, savings):
+    """Build the dashboard's financial summary table once per distinct set of figures."""
+    return pd.DataFrame({
+        "Metric": _METRICS,
+        "Amount": np.array([net_worth, income, total_expenses, savings], dtype=np.float64)
+    })
 
-    
-    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    st.markdown(f"Last Updated: {last_updated}")
 
 # Budget Analyzer
-elif page == "Budget Analyzer":
+@st.fragment
+def budget_analyzer_page():
     st.header("Budget Analyzer")
 
     
@@ -295,20 +296,6 @@ elif page == "Budget Analyzer":
     """, unsafe_allow_html=True)
 
     
-    st.subheader("Monthly Income")
-    income = st.number_input("Enter your monthly salary (Rs):",
-                            min_value=0.0,
-                            value=st.session_state.income,
-                            step=1000.0,
-                            format="%.2f")
-
-    
-    st.session_state.values = income
-
-    
-    st.subheader("Monthly Expenses")
-
-    
     expense_categories = [
         "Housing (Rent/Mortgage)",
         "Utilities (Electricity, Water, Gas)",
@@ -324,45 +311,59 @@ elif page == "Budget Analyzer":
         "Other"
     ]
 
-    
-    updated_expenses = {}
-
-    for category in expense_categories:
-        
-        default_value = st.session_state.expenses.get(category, 0.0)
+    # The editor's base table is kept across reruns so edits aren't reset, but
+    # Streamlit drops the editor's state when the user leaves this page, so
+    # rebuild it from the current expenses whenever that state is missing
+    if 'expense_table' not in st.session_state or 'expense_editor' not in st.session_state:
+        saved_categories = [c for c in st.session_state.expenses if c not in expense_categories]
+        table_categories = expense_categories + saved_categories
+        st.session_state.expense_table = pd.DataFrame({
+            "Category": table_categories,
+            "Amount": [float(st.session_state.expenses.get(c, 0.0)) for c in table_categories]
+        })
 
-        
-        expense_value = st.number_input(
-            f"{category} (Rs):",
-            min_value=0.0,
-            value=default_value,
-            step=100.0,
-            format="%.2f",
-            key=f"expense_{category}"
+    # Inputs live in a form so editing them doesn't rerun the page until Update is pressed
+    with st.form("budget_form"):
+        st.subheader("Monthly Income")
+        income = st.number_input("Enter your monthly salary (Rs):",
+                                min_value=0.0,
+                                value=st.session_state.income,
+                                step=1000.0,
+                                format="%.2f")
+
+        st.subheader("Monthly Expenses")
+        st.caption("Edit amounts directly, or add a row for a custom expense category.")
+        edited_expenses = st.data_editor(
+            st.session_state.expense_table,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            key="expense_editor",
+            column_config={
+                "Category": st.column_config.TextColumn("Category", required=True),
+                "Amount": st.column_config.NumberColumn("Amount (Rs)", min_value=0.0, step=100.0, format="%.2f")
+            }
         )
 
-        
-        if expense_value > 0:
-            updated_expenses[category] = expense_value
+        st.form_submit_button("Update")
 
     
-    st.markdown("---")
-    custom_category = st.text_input("Add a custom expense category:")
-
-    if custom_category:
-        default_value = st.session_state.expenses.get(custom_category, 0.0)
-        custom_value = st.number_input(
-            f"{custom_category} (Rs):",
-            min_value=0.0,
-            value=default_value,
-            step=100.0,
-            format="%.2f"
-        )
-        if custom_value > 0:
-            updated_expenses[custom_category] = custom_value
+    st.session_state.values = income
 
     
-    st.session_state.expenses = updated_expenses
+    edited_amounts = {
+        category: float(amount)
+        for category, amount in zip(edited_expenses["Category"], edited_expenses["Amount"])
+        if pd.notna(category) and str(category).strip() and pd.notna(amount) and amount > 0
+    }
+
+    # Update session expenses in place, touching only categories that changed
+    updated_expenses = st.session_state.expenses
+    for category in updated_expenses.keys() - edited_amounts.keys():
+        del updated_expenses[category]
+    for category, amount in edited_amounts.items():
+        if updated_expenses.get(category) != amount:
+            updated_expenses[category] = amount
 
     
     budget_summary = calculate_budget_summary(income, updated_expenses)
@@ -391,12 +392,12 @@ elif page == "Budget Analyzer":
     
     if updated_expenses:
         st.subheader("Income vs Expenses")
-        fig = create_income_expense_bar_chart(income, total_expenses, remaining)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = _cached_income_expense_bar_chart(income, total_expenses, remaining)
+        st.plotly_chart(fig, use_container_width=True, key="budget_bar_chart")
 
         st.subheader("Expense Breakdown")
-        pie_fig = create_expense_pie_chart(updated_expenses)
-        st.plotly_chart(pie_fig, use_container_width=True)
+        pie_fig = _cached_expense_pie_chart(tuple(updated_expenses.items()))
+        st.plotly_chart(pie_fig, use_container_width=True, key="budget_pie_chart")
 
         
         df_expenses = pd.DataFrame(list(updated_expenses.items()), columns=["Category", "Amount"])
@@ -407,30 +408,94 @@ elif page == "Budget Analyzer":
         st.markdown("---")
         st.subheader("AI Budget Analysis")
 
-        with st.spinner("Analyzing your budget..."):
-            budget_analysis = analyze_budget(income, updated_expenses)
+        if st.button("Analyze Budget"):
+            with st.spinner("Analyzing your budget..."):
+                from geminiai_use import analyze_budget
+                budget_analysis = analyze_budget(income, updated_expenses)
 
-            if isinstance(budget_analysis, str):
-                
-                display_ai_advice("Budget Recommendations", budget_analysis)
-            elif isinstance(budget_analysis, dict):
-                
-                if "analysis" in budget_analysis:
-                    display_ai_advice("Budget Analysis", budget_analysis["analysis"])
+                if isinstance(budget_analysis, str):
+                    
+                    display_ai_advice("Budget Recommendations", budget_analysis)
+                elif isinstance(budget_analysis, dict):
+                    
+                    if "overall_analysis" in budget_analysis:
+                        display_ai_advice("Budget Analysis", budget_analysis["overall_analysis"])
 
-                if "recommendations" in budget_analysis:
-                    display_ai_advice("Recommendations", budget_analysis["recommendations"])
+                    if "recommendations" in budget_analysis:
+                        display_ai_advice("Recommendations", budget_analysis["recommendations"])
 
-            
-            if st.session_state.user_id:
-                ai_insight = str(budget_analysis)
-                save_ai_insight(st.session_state.user_id, "budget_analysis", ai_insight)
+                    if "improvements" in budget_analysis:
+                        display_ai_advice("Where You Can Save", budget_analysis["improvements"])
+
+                
+                # Only persist the insight when it differs from the last one saved
+                if st.session_state.user_id:
+                    # Serialized once, both for the change check and for storage
+                    if isinstance(budget_analysis, dict):
+                        insight_text, insight_format = json.dumps(budget_analysis, sort_keys=True), "json"
+                    else:
+                        insight_text, insight_format = budget_analysis, "text"
+                    insight_hash = hash(insight_text)
+                    if st.session_state.get("last_insight_hash") != insight_hash:
+                        save_ai_insight(st.session_state.user_id, "budget_analysis", insight_text, content_format=insight_format)
+                        st.session_state.last_insight_hash = insight_hash
 
     
     st.markdown("</div>", unsafe_allow_html=True)
 
+
 # AI Financial Advisor
-elif page == "AI Financial Advisor":
+def current_financial_context():
+    """Collect the user's financial data to send along with advisor queries."""
+    return {
+        "income": st.session_state.income,
+        "expenses": st.session_state.expenses,
+        "assets": st.session_state.assets,
+        "liabilities": st.session_state.liabilities,
+        "goals": st.session_state.financial_goals,
+        "portfolio": st.session_state.portfolio
+    }
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_advice(query, context_json):
+    """Ask the advisor once per distinct (query, financial context) pair."""
+    from geminiai_use import generate_financial_adivice
+    return generate_financial_adivice(query, context_json)
+
+
+def add_chat_message(role, content, timestamp):
+    """Record a chat message, appending its display row instead of rebuilding the table."""
+    st.session_state.chat_history.append({"role": role, "content": content, "timestamp": timestamp})
+
+    chat_df = st.session_state.chat_df
+    chat_df.loc[len(chat_df)] = ["You" if role == "user" else "AI Financial Advisor", content, timestamp]
+
+
+def ask_advisor(query):
+    """Add a query and the AI advisor's response to the chat history."""
+    # One timestamp for the whole exchange
+    now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    add_chat_message("user", query, now_str)
+
+    with st.spinner("Thinking..."):
+        try:
+            # Sorted keys give the same cache key for the same data in any order
+            context_json = json.dumps(current_financial_context(), sort_keys=True, default=str)
+            response = _cached_advice(query, context_json)
+        except Exception as e:
+            response = f"An error occurred: {e}"
+
+        add_chat_message("assistant", response, now_str)
+
+
+def queue_advisor_query(query):
+    """Queue a query for the advisor page to ask on its next run."""
+    st.session_state.pending_query = query
+
+
+@st.fragment
+def advisor_page():
     st.header("AI Financial Advisor")
 
     # Display chat interface
@@ -439,47 +504,25 @@ elif page == "AI Financial Advisor":
     # User input
     user_query = st.text_input("Your financial question:", placeholder="e.g., How can I reduce my debt? or What's the best way to save for retirement?")
 
+    # Suggested topics go through the same path as typed questions
+    pending_query = st.session_state.pop("pending_query", None)
+    if pending_query:
+        user_query = pending_query
+
     # Process user query
     if user_query:
-        # Add to chat history
-        st.session_state.chat_history.append({"role": "user", "content": user_query, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
-
-        #financial context
-        financial_context = {
-            "income": st.session_state.income,
-            "expenses": st.session_state.expenses,
-            "assets": st.session_state.assets,
-            "liabilities": st.session_state.liabilities,
-            "goals": st.session_state.financial_goals,
-            "portfolio": st.session_state.portfolio
-        }
-
-        # AI response
-        with st.spinner("Thinking..."):
-            response = generate_financial_adivice(user_query, financial_context) # type: ignore
-
-            # Add to chat history
-            st.session_state.chat_history.append({"role": "assistant", "content": response, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+        ask_advisor(user_query)
 
     
     st.markdown("### Conversation")
 
-    # Create chat history
-    chat_data = []
-    for message in st.session_state.chat_history:
-        chat_data.append({
-            "Role": "You" if message["role"] == "user" else "AI Financial Advisor",
-            "Content": message["content"],
-            "Timestamp": message["timestamp"]
-        })
-    df_chat_history = pd.DataFrame(chat_data)
-
-    
-    st.table(df_chat_history)
+    # Show only the most recent messages
+    st.dataframe(st.session_state.chat_df.tail(CHAT_HISTORY_VISIBLE_ROWS), use_container_width=True, hide_index=True)
 
     
     if st.session_state.chat_history and st.button("Clear Chat History"):
         st.session_state.chat_history = []
+        st.session_state.chat_df = pd.DataFrame(columns=CHAT_COLUMNS)
         st.rerun()
 
     
@@ -499,31 +542,70 @@ elif page == "AI Financial Advisor":
 
     for i, topic in enumerate(topics):
         with topic_cols[i % 3]:
-            if st.button(topic, key=f"topic_{i}"):
-                
-                user_query = topic
+            st.button(topic, key=f"topic_{i}", on_click=queue_advisor_query, args=(topic,))
 
-                
-                st.session_state.chat_history.append({"role": "user", "content": topic, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
 
-                
-                financial_context = {
-                    "income": st.session_state.income,
-                    "expenses": st.session_state.expenses,
-                    "assets": st.session_state.assets,
-                    "liabilities": st.session_state.liabilities,
-                    "goals": st.session_state.financial_goals,
-                    "portfolio": st.session_state.portfolio
-                }
+# Dashboard
+if page == "Dashboard":
+    from moneyanalyser import calculate_net_worth, calculate_emergency_fund_ratio
 
-                
-                with st.spinner("Thinking..."):
-                    response = generate_financial_adivice(topic, financial_context) # type: ignore
+    st.header("Financial Dashboard")
+
+    
+    col1, col2 = st.columns(2)
 
+    # Expense totals are computed once and reused by every metric below
+    expense_values = np.fromiter(st.session_state.expenses.values(), dtype=np.float64, count=len(st.session_state.expenses))
+    total_expenses = float(expense_values.sum())
+    savings = st.session_state.income - total_expenses
 
-                    st.session_state.chat_history.append({"role": "assistant", "content": response, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+    with col1:
+        st.subheader("Financial Summary")
 
-                st.rerun()
+        # Net Worth Calculation
+        net_worth, total_assets, total_liabilities = calculate_net_worth(
+            st.session_state.assets,
+            st.session_state.liabilities
+        )
+
+        # Display key metrics
+        st.metric("Net Worth", format_currency(net_worth))
+
+        # Income and Expenses
+        if st.session_state.expenses:
+            st.metric("Monthly Income", format_currency(st.session_state.income))
+            st.metric("Monthly Expenses", format_currency(total_expenses))
+            st.metric("Monthly Savings", format_currency(savings))
+
+        
+        if st.session_state.expenses and 'Emergency Fund' in st.session_state.assets:
+            emergency_fund = st.session_state.assets.get('Emergency Fund', 0)
+            months_covered = calculate_emergency_fund_ratio(emergency_fund, total_expenses)
+            if months_covered is not None:
+                st.metric("Emergency Fund Coverage", f"{months_covered:.1f} months")
+
+        
+        df_financial_data = _cached_financial_summary(net_worth, st.session_state.income, total_expenses, savings)
+        st.table(df_financial_data)
+
+    with col2:
+        
+        if st.session_state.expenses:
+            st.subheader("Expense Breakdown")
+            fig = _cached_expense_pie_chart(tuple(st.session_state.expenses.items()))
+            st.plotly_chart(fig, use_container_width=True, key="dashboard_pie_chart")
+        else:
+            st.info("Add your expenses in the Budget Analyzer to see a breakdown.")
+
+    
+    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    st.markdown(f"Last Updated: {last_updated}")
+
+elif page == "Budget Analyzer":
+    budget_analyzer_page()
+
+elif page == "AI Financial Advisor":
+    advisor_page()
 
 
 st.markdown("---")
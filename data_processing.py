@@ -1,10 +1,13 @@
-import yfinance as yf
+import re
+import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from functools import lru_cache
 
+@lru_cache(maxsize=1024)
 def format_currency(amount):
-    """Format a number as currency"""
+    """Format a number as currency (memoized, since the same values are re-rendered on every rerun)"""
     if amount >= 0:
         return f"Rs {amount:,.2f}"
     else:
@@ -21,7 +24,13 @@ def calculate_budget_summary(income, expenses):
     Returns:
         dict: Budget summary statistics
     """
-    if not expenses:
+    expense_items = tuple(expenses.items()) if expenses else ()
+    return dict(_budget_summary(income, expense_items))
+
+@lru_cache(maxsize=128)
+def _budget_summary(income, expense_items):
+    """Memoized core of calculate_budget_summary keyed on hashable expense items."""
+    if not expense_items:
         return {
             "income": income,
             "total_expenses": 0,
@@ -29,7 +38,7 @@ def calculate_budget_summary(income, expenses):
             "savings_rate": 100 if income > 0 else 0
         }
     
-    total_expenses = sum(expenses.values())
+    total_expenses = float(np.fromiter((amount for _, amount in expense_items), dtype=np.float64, count=len(expense_items)).sum())
     remaining = income - total_expenses
     savings_rate = (remaining / income) * 100 if income > 0 else 0
     
@@ -40,9 +49,13 @@ def calculate_budget_summary(income, expenses):
         "savings_rate": savings_rate
     }
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_stock_data(ticker, period="1y"):
     """
     Fetch stock data for a given ticker.
+
+    Results are cached per (ticker, period) for an hour so Streamlit reruns
+    don't repeat the network request.
     
     Args:
         ticker (str): Stock ticker symbol
@@ -51,6 +64,9 @@ def fetch_stock_data(ticker, period="1y"):
     Returns:
         pandas.DataFrame: Stock data
     """
+    # Imported lazily so the app doesn't pay for yfinance until stock data is needed
+    import yfinance as yf
+
     try:
         stock = yf.Ticker(ticker)
         hist = stock.history(period=period)
@@ -95,6 +111,37 @@ def calculate_investment_returns(initial_investment, monthly_contribution, years
     
     return final_amount, total_contribution, total_earnings
 
+def calculate_investment_returns_curve(initial_investment, monthly_contribution, years, rate_of_return):
+    """
+    Calculate the investment value at every month, vectorized with NumPy.
+
+    Args:
+        initial_investment (float): Initial investment amount
+        monthly_contribution (float): Monthly contribution amount
+        years (int): Number of years for investment
+        rate_of_return (float): Annual rate of return as a decimal (e.g., 0.07 for 7%)
+
+    Returns:
+        tuple: (values, contributions) NumPy arrays indexed by month, from 0 to years*12
+    """
+    # Convert annual rate to monthly
+    monthly_rate = rate_of_return / 12
+
+    # Month numbers, including the starting point
+    months = np.arange(years * 12 + 1)
+
+    # Compound the initial investment and the stream of monthly contributions
+    growth = (1 + monthly_rate) ** months
+    values = initial_investment * growth
+    if monthly_rate != 0:
+        values += monthly_contribution * (growth - 1) / monthly_rate
+    else:
+        values += monthly_contribution * months
+
+    contributions = initial_investment + monthly_contribution * months
+
+    return values, contributions
+
 def calculate_loan_payment(principal, annual_rate, years):
     """
     Calculate monthly loan payment.
@@ -142,30 +189,52 @@ def generate_amortization_schedule(principal, annual_rate, years):
     # Total number of payments
     n_payments = years * 12
     
-    # Create amortization schedule
-    schedule = []
-    remaining_balance = principal
-    
-    for month in range(1, n_payments + 1):
-        # Calculate interest payment
-        interest_payment = remaining_balance * monthly_rate
-        
-        # Calculate principal payment
-        principal_payment = monthly_payment - interest_payment
-        
-        # Update remaining balance
-        remaining_balance -= principal_payment
-        
-        # Add to schedule
-        schedule.append({
-            'month': month,
-            'payment': monthly_payment,
-            'principal': principal_payment,
-            'interest': interest_payment,
-            'remaining_balance': max(0, remaining_balance)
-        })
-    
-    return pd.DataFrame(schedule)
+    # Month numbers for the whole schedule
+    months = np.arange(1, n_payments + 1)
+
+    # Remaining balance after each month (closed form of the amortization recurrence)
+    if monthly_rate == 0:
+        remaining_balance = principal - monthly_payment * months
+    else:
+        growth = (1 + monthly_rate) ** months
+        remaining_balance = principal * growth - monthly_payment * (growth - 1) / monthly_rate
+
+    # Interest is charged on the balance carried into each month
+    interest_payment = np.empty(n_payments)
+    interest_payment[0] = principal * monthly_rate
+    interest_payment[1:] = remaining_balance[:-1] * monthly_rate
+
+    # Calculate principal payment
+    principal_payment = monthly_payment - interest_payment
+
+    # Columns are already contiguous arrays, so let pandas use them without copying
+    return pd.DataFrame({
+        'month': months,
+        'payment': np.full(n_payments, monthly_payment, dtype=np.float64),
+        'principal': principal_payment,
+        'interest': interest_payment,
+        'remaining_balance': np.maximum(remaining_balance, 0, out=remaining_balance)
+    }, copy=False)
+
+# Common keywords for expense categories, in matching priority order
+CATEGORY_KEYWORDS = {
+    'Housing': ['rent', 'mortgage', 'hoa', 'property tax'],
+    'Utilities': ['electric', 'gas', 'water', 'internet', 'phone', 'utility'],
+    'Groceries': ['grocery', 'groceries', 'supermarket', 'food'],
+    'Transportation': ['gas', 'fuel', 'car', 'auto', 'transportation', 'uber', 'lyft', 'taxi'],
+    'Dining': ['restaurant', 'cafe', 'coffee', 'dining', 'doordash', 'grubhub', 'takeout'],
+    'Entertainment': ['movie', 'subscription', 'netflix', 'spotify', 'entertainment'],
+    'Shopping': ['amazon', 'walmart', 'target', 'shopping', 'clothes', 'clothing'],
+    'Health': ['doctor', 'medical', 'pharmacy', 'health', 'insurance', 'dental', 'vision'],
+    'Education': ['school', 'tuition', 'book', 'course', 'education'],
+    'Personal': ['haircut', 'gym', 'fitness', 'personal']
+}
+
+# One compiled alternation per category so each description is scanned in C
+CATEGORY_PATTERNS = {
+    category: re.compile('|'.join(map(re.escape, keywords)))
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
 
 def categorize_expenses(transactions):
     """
@@ -177,45 +246,35 @@ def categorize_expenses(transactions):
     Returns:
         dict: Expenses categorized by category
     """
-    # Define common keywords for categories
-    category_keywords = {
-        'Housing': ['rent', 'mortgage', 'hoa', 'property tax'],
-        'Utilities': ['electric', 'gas', 'water', 'internet', 'phone', 'utility'],
-        'Groceries': ['grocery', 'groceries', 'supermarket', 'food'],
-        'Transportation': ['gas', 'fuel', 'car', 'auto', 'transportation', 'uber', 'lyft', 'taxi'],
-        'Dining': ['restaurant', 'cafe', 'coffee', 'dining', 'doordash', 'grubhub', 'takeout'],
-        'Entertainment': ['movie', 'subscription', 'netflix', 'spotify', 'entertainment'],
-        'Shopping': ['amazon', 'walmart', 'target', 'shopping', 'clothes', 'clothing'],
-        'Health': ['doctor', 'medical', 'pharmacy', 'health', 'insurance', 'dental', 'vision'],
-        'Education': ['school', 'tuition', 'book', 'course', 'education'],
-        'Personal': ['haircut', 'gym', 'fitness', 'personal']
-    }
+    if not transactions:
+        return {}
+    
+    transaction_items = tuple((t['amount'], t['description']) for t in transactions)
+    return _categorize_transaction_items(transaction_items)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _categorize_transaction_items(transaction_items):
+    """Cached core of categorize_expenses keyed on (amount, description) tuples."""
+    df = pd.DataFrame(transaction_items, columns=['amount', 'description'])
     
-    # Initialize categories
-    categories = {category: 0 for category in category_keywords}
-    categories['Other'] = 0
+    # Keep expenses only (income has positive amounts)
+    df = df[df['amount'] <= 0]
+    if df.empty:
+        return {}
     
-    # Categorize transactions
-    for transaction in transactions:
-        amount = transaction['amount']
-        description = transaction['description'].lower()
-        
-        # Skip income (positive amounts)
-        if amount <= 0:
-            # Convert to positive expense amount
-            expense_amount = abs(amount)
-            
-            # Determine category
-            category_found = False
-            for category, keywords in category_keywords.items():
-                if any(keyword in description for keyword in keywords):
-                    categories[category] += expense_amount
-                    category_found = True
-                    break
-            
-            # If no category matches, add to Other
-            if not category_found:
-                categories['Other'] += expense_amount
-    
-    # Remove categories with zero expenses
-    return {k: v for k, v in categories.items() if v > 0}
+    expense = df['amount'].abs()
+    description = df['description'].str.lower()
+    
+    # First matching category wins, in CATEGORY_KEYWORDS order
+    conditions = [
+        description.str.contains(pattern).to_numpy()
+        for pattern in CATEGORY_PATTERNS.values()
+    ]
+    category = np.select(conditions, list(CATEGORY_PATTERNS), default='Other')
+    
+    totals = expense.groupby(category).sum()
+    
+    # Preserve category order and remove categories with zero expenses
+    order = [c for c in list(CATEGORY_KEYWORDS) + ['Other'] if c in totals.index]
+    totals = totals.reindex(order)
+    return totals[totals > 0].to_dict()
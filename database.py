@@ -1,227 +1,305 @@
 import sqlite3
 import os
+import copy
 import json
+import atexit
+import threading
+import time
 from datetime import datetime
 
 # Database path
 DB_PATH = "artha_finance.db"
 
-def initialize_database():
+# Bytes of the database file to memory-map for reads (256 MB)
+MMAP_SIZE = 268435456
+
+# Prepared statements kept per connection, keyed by SQL text
+CACHED_STATEMENTS = 256
+
+# Parsed insight contents keyed by (id, generated_at), bounded to this many rows
+PARSED_INSIGHTS_CACHE_SIZE = 1024
+_parsed_insights = {}
+
+# Shared connection, opened lazily and reused by every helper in this module
+_conn = None
+_db_lock = threading.RLock()
+
+def _configure_connection(conn):
+    """Apply performance PRAGMAs to a newly opened connection."""
+    # WAL lets readers and writers run concurrently and avoids an fsync per commit;
+    # it isn't supported for in-memory databases
+    if DB_PATH != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA busy_timeout=5000")
+    # Serve reads from a memory-mapped view of the file instead of read() copies
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+
+def _get_conn():
+    """Return the shared database connection, opening it on first use."""
+    global _conn
+    with _db_lock:
+        if _conn is None:
+            _conn = sqlite3.connect(
+                DB_PATH,
+                check_same_thread=False,
+                cached_statements=CACHED_STATEMENTS
+            )
+            _conn.row_factory = sqlite3.Row
+            _configure_connection(_conn)
+        return _conn
+
+@atexit.register
+def _close_conn():
+    """Close the shared database connection at process exit."""
+    global _conn
+    with _db_lock:
+        if _conn is not None:
+            # Let SQLite refresh planner statistics that have gone stale
+            _conn.execute("PRAGMA optimize")
+            _conn.close()
+            _conn = None
+
+def initialize_database(conn=None):
     """Initialize the database with necessary tables if they don't exist."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        email TEXT UNIQUE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Create income_data table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS income_data (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        amount REAL NOT NULL,
-        source TEXT,
-        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Create expenses table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS expenses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        category TEXT NOT NULL,
-        amount REAL NOT NULL,
-        description TEXT,
-        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Create assets table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS assets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        value REAL NOT NULL,
-        category TEXT,
-        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Create liabilities table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS liabilities (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        amount REAL NOT NULL,
-        interest_rate REAL,
-        category TEXT,
-        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Create financial_goals table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS financial_goals (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        name TEXT NOT NULL,
-        target_amount REAL NOT NULL,
-        current_amount REAL DEFAULT 0,
-        deadline TEXT,
-        priority INTEGER,
-        date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Create investment_portfolio table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS investment_portfolio (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        ticker TEXT NOT NULL,
-        shares REAL NOT NULL,
-        cost_basis REAL NOT NULL,
-        purchase_date TEXT,
-        date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Create ai_insights table to store generated insights
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS ai_insights (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        insight_type TEXT NOT NULL,
-        content TEXT NOT NULL,
-        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Commit changes and close connection
-    conn.commit()
-    conn.close()
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        # Create users table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # Create income_data table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS income_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            source TEXT,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''')
+        
+        # Create expenses table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''')
+        
+        # Create assets table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            value REAL NOT NULL,
+            category TEXT,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''')
+        
+        # Create liabilities table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS liabilities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            amount REAL NOT NULL,
+            interest_rate REAL,
+            category TEXT,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''')
+        
+        # Create financial_goals table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS financial_goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            target_amount REAL NOT NULL,
+            current_amount REAL DEFAULT 0,
+            deadline TEXT,
+            priority INTEGER,
+            date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''')
+        
+        # Create investment_portfolio table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS investment_portfolio (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            ticker TEXT NOT NULL,
+            shares REAL NOT NULL,
+            cost_basis REAL NOT NULL,
+            purchase_date TEXT,
+            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''')
+        
+        # Create ai_insights table to store generated insights
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ai_insights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            insight_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            content_format TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''')
+        
+        # Add content_format to ai_insights tables created before it existed
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(ai_insights)")]
+        if 'content_format' not in columns:
+            cursor.execute("ALTER TABLE ai_insights ADD COLUMN content_format TEXT")
+        
+        # Create ai_response_cache table to reuse model responses across restarts
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ai_response_cache (
+            prompt_hash TEXT PRIMARY KEY,
+            content TEXT NOT NULL,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # Create stock_metrics_cache table so quotes survive restarts;
+        # fetched_at is a Unix timestamp to make age checks cheap
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_metrics_cache (
+            ticker TEXT PRIMARY KEY,
+            metrics TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+        ''')
+        
+        # Create indexes so per-user lookups don't scan whole tables
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_income_user_date ON income_data (user_id, date DESC)")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_expenses_user_category ON expenses (user_id, category)")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_assets_user_name ON assets (user_id, name)")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_liabilities_user_name ON liabilities (user_id, name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_user_priority ON financial_goals (user_id, priority DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_user ON investment_portfolio (user_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_insights_user_type_time ON ai_insights (user_id, insight_type, generated_at DESC)")
+        
+        # Gather table statistics so the query planner picks the right indexes
+        cursor.execute("ANALYZE")
 
-def get_or_create_user(username, email=None):
+def get_or_create_user(username, email=None, conn=None):
     """Get a user or create if it doesn't exist."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Check if user exists
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    
-    if user:
-        user_id = user[0]
-    else:
-        # Create new user
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        # Logins for existing users are read-only, so they don't take the write lock
+        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+        user = cursor.fetchone()
+        if user:
+            return user[0]
+        
+        # Create new user; if another process created it in the meantime,
+        # nothing is inserted and the existing id is read back instead
         cursor.execute(
-            "INSERT INTO users (username, email) VALUES (?, ?)",
+            """INSERT INTO users (username, email) VALUES (?, ?)
+               ON CONFLICT (username) DO NOTHING
+               RETURNING id""",
             (username, email)
         )
-        conn.commit()
-        user_id = cursor.lastrowid
-    
-    conn.close()
-    return user_id
+        user = cursor.fetchone()
+        if user is None:
+            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+            user = cursor.fetchone()
+        return user[0]
 
-def save_income(user_id, amount, source=None):
-    """Save income data for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+def _write_income(cursor, user_id, amount, source=None):
+    """Insert an income row using an open cursor."""
     cursor.execute(
         "INSERT INTO income_data (user_id, amount, source) VALUES (?, ?, ?)",
         (user_id, amount, source)
     )
-    
-    conn.commit()
-    conn.close()
 
-def save_expenses(user_id, expenses_dict):
-    """Save expenses for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Clear existing expenses for the user (optional, depending on your needs)
-    cursor.execute("DELETE FROM expenses WHERE user_id = ?", (user_id,))
-    
-    # Insert new expenses
-    for category, amount in expenses_dict.items():
-        cursor.execute(
-            "INSERT INTO expenses (user_id, category, amount) VALUES (?, ?, ?)",
-            (user_id, category, amount)
-        )
+def _write_expenses(cursor, user_id, expenses_dict):
+    """Replace a user's expenses using an open cursor, touching only changed rows."""
+    # Insert new expenses and update existing ones
+    cursor.executemany(
+        """INSERT INTO expenses (user_id, category, amount) VALUES (?, ?, ?)
+           ON CONFLICT (user_id, category) DO UPDATE SET amount = excluded.amount""",
+        [(user_id, category, amount) for category, amount in expenses_dict.items()]
+    )
     
-    conn.commit()
-    conn.close()
+    # Remove expenses that are no longer present
+    cursor.execute(
+        """DELETE FROM expenses
+           WHERE user_id = ? AND category NOT IN (SELECT value FROM json_each(?))""",
+        (user_id, json.dumps(list(expenses_dict)))
+    )
 
-def save_assets(user_id, assets_dict):
-    """Save assets for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Clear existing assets for the user
-    cursor.execute("DELETE FROM assets WHERE user_id = ?", (user_id,))
-    
-    # Insert new assets
-    for name, value in assets_dict.items():
-        cursor.execute(
-            "INSERT INTO assets (user_id, name, value) VALUES (?, ?, ?)",
-            (user_id, name, value)
-        )
+def _write_assets(cursor, user_id, assets_dict):
+    """Replace a user's assets using an open cursor, touching only changed rows."""
+    # Insert new assets and update existing ones
+    cursor.executemany(
+        """INSERT INTO assets (user_id, name, value) VALUES (?, ?, ?)
+           ON CONFLICT (user_id, name) DO UPDATE SET value = excluded.value""",
+        [(user_id, name, value) for name, value in assets_dict.items()]
+    )
     
-    conn.commit()
-    conn.close()
+    # Remove assets that are no longer present
+    cursor.execute(
+        """DELETE FROM assets
+           WHERE user_id = ? AND name NOT IN (SELECT value FROM json_each(?))""",
+        (user_id, json.dumps(list(assets_dict)))
+    )
 
-def save_liabilities(user_id, liabilities_dict):
-    """Save liabilities for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Clear existing liabilities for the user
-    cursor.execute("DELETE FROM liabilities WHERE user_id = ?", (user_id,))
-    
-    # Insert new liabilities
-    for name, amount in liabilities_dict.items():
-        cursor.execute(
-            "INSERT INTO liabilities (user_id, name, amount) VALUES (?, ?, ?)",
-            (user_id, name, amount)
-        )
+def _write_liabilities(cursor, user_id, liabilities_dict):
+    """Replace a user's liabilities using an open cursor, touching only changed rows."""
+    # Insert new liabilities and update existing ones
+    cursor.executemany(
+        """INSERT INTO liabilities (user_id, name, amount) VALUES (?, ?, ?)
+           ON CONFLICT (user_id, name) DO UPDATE SET amount = excluded.amount""",
+        [(user_id, name, amount) for name, amount in liabilities_dict.items()]
+    )
     
-    conn.commit()
-    conn.close()
+    # Remove liabilities that are no longer present
+    cursor.execute(
+        """DELETE FROM liabilities
+           WHERE user_id = ? AND name NOT IN (SELECT value FROM json_each(?))""",
+        (user_id, json.dumps(list(liabilities_dict)))
+    )
 
-def save_financial_goals(user_id, goals_data):
-    """Save financial goals for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+def _write_financial_goals(cursor, user_id, goals_data):
+    """Replace a user's financial goals using an open cursor."""
     # Clear existing goals for the user
     cursor.execute("DELETE FROM financial_goals WHERE user_id = ?", (user_id,))
     
     # Insert new goals
-    for goal in goals_data:
-        cursor.execute(
-            """INSERT INTO financial_goals 
-            (user_id, name, target_amount, current_amount, deadline, priority)
-            VALUES (?, ?, ?, ?, ?, ?)""",
+    cursor.executemany(
+        """INSERT INTO financial_goals 
+        (user_id, name, target_amount, current_amount, deadline, priority)
+        VALUES (?, ?, ?, ?, ?, ?)""",
+        [
             (
                 user_id, 
                 goal['name'], 
@@ -230,25 +308,21 @@ def save_financial_goals(user_id, goals_data):
                 goal.get('deadline'),
                 goal.get('priority', 0)
             )
-        )
-    
-    conn.commit()
-    conn.close()
+            for goal in goals_data
+        ]
+    )
 
-def save_investment_portfolio(user_id, portfolio_data):
-    """Save investment portfolio data for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+def _write_investment_portfolio(cursor, user_id, portfolio_data):
+    """Replace a user's investment portfolio using an open cursor."""
     # Clear existing portfolio data for the user
     cursor.execute("DELETE FROM investment_portfolio WHERE user_id = ?", (user_id,))
     
     # Insert new portfolio data
-    for item in portfolio_data:
-        cursor.execute(
-            """INSERT INTO investment_portfolio 
-            (user_id, ticker, shares, cost_basis, purchase_date)
-            VALUES (?, ?, ?, ?, ?)""",
+    cursor.executemany(
+        """INSERT INTO investment_portfolio 
+        (user_id, ticker, shares, cost_basis, purchase_date)
+        VALUES (?, ?, ?, ?, ?)""",
+        [
             (
                 user_id,
                 item['ticker'],
@@ -256,181 +330,326 @@ def save_investment_portfolio(user_id, portfolio_data):
                 item['cost_basis'],
                 item.get('purchase_date')
             )
-        )
-    
-    conn.commit()
-    conn.close()
-
-def save_ai_insight(user_id, insight_type, content):
-    """Save AI-generated insights for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Convert content to JSON if it's not a string
-    if not isinstance(content, str):
-        content = json.dumps(content)
-    
-    cursor.execute(
-        "INSERT INTO ai_insights (user_id, insight_type, content) VALUES (?, ?, ?)",
-        (user_id, insight_type, content)
+            for item in portfolio_data
+        ]
     )
-    
-    conn.commit()
-    conn.close()
 
-def get_user_income(user_id):
+def save_income(user_id, amount, source=None, conn=None):
+    """Save income data for a user."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        _write_income(cursor, user_id, amount, source)
+
+def save_expenses(user_id, expenses_dict, conn=None):
+    """Save expenses for a user."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        _write_expenses(cursor, user_id, expenses_dict)
+
+def save_assets(user_id, assets_dict, conn=None):
+    """Save assets for a user."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        _write_assets(cursor, user_id, assets_dict)
+
+def save_liabilities(user_id, liabilities_dict, conn=None):
+    """Save liabilities for a user."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        _write_liabilities(cursor, user_id, liabilities_dict)
+
+def save_financial_goals(user_id, goals_data, conn=None):
+    """Save financial goals for a user."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        _write_financial_goals(cursor, user_id, goals_data)
+
+def save_investment_portfolio(user_id, portfolio_data, conn=None):
+    """Save investment portfolio data for a user."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        _write_investment_portfolio(cursor, user_id, portfolio_data)
+
+def save_all(user_id, payload, conn=None):
+    """
+    Save all of a user's financial data in a single transaction.
+    
+    Only the keys present in payload are written: income, expenses, assets,
+    liabilities, financial_goals and portfolio.
+    """
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        # Take the write lock up front so the batch never has to upgrade
+        # from a read lock partway through
+        cursor.execute("BEGIN IMMEDIATE")
+        
+        if 'income' in payload:
+            _write_income(cursor, user_id, payload['income'])
+        if 'expenses' in payload:
+            _write_expenses(cursor, user_id, payload['expenses'])
+        if 'assets' in payload:
+            _write_assets(cursor, user_id, payload['assets'])
+        if 'liabilities' in payload:
+            _write_liabilities(cursor, user_id, payload['liabilities'])
+        if 'financial_goals' in payload:
+            _write_financial_goals(cursor, user_id, payload['financial_goals'])
+        if 'portfolio' in payload:
+            _write_investment_portfolio(cursor, user_id, payload['portfolio'])
+
+def save_ai_insight(user_id, insight_type, content, conn=None, content_format=None):
+    """Save AI-generated insights for a user.
+    
+    Callers that have already serialized the content can pass content_format
+    to skip re-detecting it.
+    """
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        # Convert content to JSON if it's not a string, and record whether
+        # the stored text is JSON so readers don't have to guess
+        if content_format is None:
+            if not isinstance(content, str):
+                content = json.dumps(content)
+                content_format = 'json'
+            else:
+                try:
+                    json.loads(content)
+                    content_format = 'json'
+                except json.JSONDecodeError:
+                    content_format = 'text'
+        
+        cursor.execute(
+            """INSERT INTO ai_insights (user_id, insight_type, content, content_format)
+               VALUES (?, ?, ?, ?)""",
+            (user_id, insight_type, content, content_format)
+        )
+
+def get_user_income(user_id, conn=None):
     """Get the latest income for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT amount FROM income_data WHERE user_id = ? ORDER BY date DESC LIMIT 1",
-        (user_id,)
-    )
-    
-    result = cursor.fetchone()
-    conn.close()
-    
-    return result[0] if result else 0
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT amount FROM income_data WHERE user_id = ? ORDER BY date DESC LIMIT 1",
+            (user_id,)
+        )
+        
+        result = cursor.fetchone()
+        
+        return result[0] if result else 0
 
-def get_user_expenses(user_id):
+def get_user_expenses(user_id, conn=None):
     """Get expenses for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT category, amount FROM expenses WHERE user_id = ?",
-        (user_id,)
-    )
-    
-    expenses = {}
-    for row in cursor.fetchall():
-        category, amount = row
-        expenses[category] = amount
-    
-    conn.close()
-    return expenses
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        # Stream (key, value) rows straight into the dict
+        return dict(cursor.execute(
+            "SELECT category, amount FROM expenses WHERE user_id = ?",
+            (user_id,)
+        ))
 
-def get_user_assets(user_id):
+def get_user_assets(user_id, conn=None):
     """Get assets for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT name, value FROM assets WHERE user_id = ?",
-        (user_id,)
-    )
-    
-    assets = {}
-    for row in cursor.fetchall():
-        name, value = row
-        assets[name] = value
-    
-    conn.close()
-    return assets
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        # Stream (key, value) rows straight into the dict
+        return dict(cursor.execute(
+            "SELECT name, value FROM assets WHERE user_id = ?",
+            (user_id,)
+        ))
 
-def get_user_liabilities(user_id):
+def get_user_liabilities(user_id, conn=None):
     """Get liabilities for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT name, amount FROM liabilities WHERE user_id = ?",
-        (user_id,)
-    )
-    
-    liabilities = {}
-    for row in cursor.fetchall():
-        name, amount = row
-        liabilities[name] = amount
-    
-    conn.close()
-    return liabilities
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        # Stream (key, value) rows straight into the dict
+        return dict(cursor.execute(
+            "SELECT name, amount FROM liabilities WHERE user_id = ?",
+            (user_id,)
+        ))
 
-def get_user_financial_goals(user_id):
+def get_user_financial_goals(user_id, conn=None):
     """Get financial goals for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT name, target_amount, current_amount, deadline, priority 
-           FROM financial_goals WHERE user_id = ? ORDER BY priority DESC""",
-        (user_id,)
-    )
-    
-    goals = []
-    for row in cursor.fetchall():
-        name, target_amount, current_amount, deadline, priority = row
-        goals.append({
-            'name': name,
-            'target_amount': target_amount,
-            'current_amount': current_amount,
-            'deadline': deadline,
-            'priority': priority
-        })
-    
-    conn.close()
-    return goals
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        return [dict(row) for row in cursor.execute(
+            """SELECT name, target_amount, current_amount, deadline, priority 
+               FROM financial_goals WHERE user_id = ? ORDER BY priority DESC""",
+            (user_id,)
+        )]
 
-def get_user_portfolio(user_id):
+def get_user_portfolio(user_id, conn=None):
     """Get investment portfolio for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT ticker, shares, cost_basis, purchase_date
-           FROM investment_portfolio WHERE user_id = ?""",
-        (user_id,)
-    )
-    
-    portfolio = []
-    for row in cursor.fetchall():
-        ticker, shares, cost_basis, purchase_date = row
-        portfolio.append({
-            'ticker': ticker,
-            'shares': shares,
-            'cost_basis': cost_basis,
-            'purchase_date': purchase_date
-        })
-    
-    conn.close()
-    return portfolio
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        return [dict(row) for row in cursor.execute(
+            """SELECT ticker, shares, cost_basis, purchase_date
+               FROM investment_portfolio WHERE user_id = ?""",
+            (user_id,)
+        )]
 
-def get_user_insights(user_id, insight_type=None, limit=5):
+def get_user_insights(user_id, insight_type=None, limit=5, conn=None):
     """Get AI insights for a user."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    if insight_type:
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        if insight_type:
+            cursor.execute(
+                """SELECT id, insight_type, content, generated_at, content_format
+                   FROM ai_insights WHERE user_id = ? AND insight_type = ?
+                   ORDER BY generated_at DESC LIMIT ?""",
+                (user_id, insight_type, limit)
+            )
+        else:
+            cursor.execute(
+                """SELECT id, insight_type, content, generated_at, content_format
+                   FROM ai_insights WHERE user_id = ?
+                   ORDER BY generated_at DESC LIMIT ?""",
+                (user_id, limit)
+            )
+        
+        insights = []
+        for row in cursor.fetchall():
+            insight_id, insight_type, content, generated_at, content_format = row
+            
+            insights.append({
+                'type': insight_type,
+                'content': _parse_insight_content(insight_id, generated_at, content, content_format),
+                'generated_at': generated_at
+            })
+        
+        return insights
+
+def get_user_data(user_id, conn=None):
+    """Get all of a user's financial data, read under a single lock hold."""
+    conn = conn or _get_conn()
+    with _db_lock:
+        return {
+            "income": get_user_income(user_id, conn),
+            "expenses": get_user_expenses(user_id, conn),
+            "assets": get_user_assets(user_id, conn),
+            "liabilities": get_user_liabilities(user_id, conn),
+            "financial_goals": get_user_financial_goals(user_id, conn),
+            "portfolio": get_user_portfolio(user_id, conn)
+        }
+
+def _parse_insight_content(insight_id, generated_at, content, content_format):
+    """
+    Return an insight's content, parsing JSON once per row and reusing the result.
+    
+    Callers get a deep copy, so editing a returned insight doesn't change the cached one.
+    """
+    if content_format == 'text':
+        return content
+    
+    key = (insight_id, generated_at)
+    if key in _parsed_insights:
+        return copy.deepcopy(_parsed_insights[key])
+    
+    # Convert JSON strings back to Python objects; rows saved before
+    # content_format existed may not be JSON
+    try:
+        content_parsed = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        content_parsed = content
+    
+    if len(_parsed_insights) >= PARSED_INSIGHTS_CACHE_SIZE:
+        _parsed_insights.clear()
+    _parsed_insights[key] = content_parsed
+    
+    return copy.deepcopy(content_parsed)
+
+def get_cached_ai_response(prompt_hash, max_age, conn=None):
+    """Get a model response stored for a prompt hash within the last max_age seconds, or None."""
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        # generated_at is stored by SQLite in UTC, the same as datetime('now')
         cursor.execute(
-            """SELECT insight_type, content, generated_at
-               FROM ai_insights WHERE user_id = ? AND insight_type = ?
-               ORDER BY generated_at DESC LIMIT ?""",
-            (user_id, insight_type, limit)
+            """SELECT content FROM ai_response_cache
+               WHERE prompt_hash = ? AND generated_at >= datetime('now', ?)""",
+            (prompt_hash, f"-{int(max_age)} seconds")
         )
-    else:
+        
+        result = cursor.fetchone()
+        
+        return result[0] if result else None
+
+def save_cached_ai_response(prompt_hash, content, conn=None):
+    """Store a model response under its prompt hash, stamped with the current time."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
         cursor.execute(
-            """SELECT insight_type, content, generated_at
-               FROM ai_insights WHERE user_id = ?
-               ORDER BY generated_at DESC LIMIT ?""",
-            (user_id, limit)
+            "INSERT OR REPLACE INTO ai_response_cache (prompt_hash, content) VALUES (?, ?)",
+            (prompt_hash, content)
+        )
+
+def get_cached_stock_metrics(ticker, max_age, conn=None):
+    """Get stored metrics for a ticker as (fetched_at, metrics), or None if missing or older than max_age seconds."""
+    conn = conn or _get_conn()
+    with _db_lock:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT fetched_at, metrics FROM stock_metrics_cache WHERE ticker = ? AND fetched_at >= ?",
+            (ticker, time.time() - max_age)
+        )
+        
+        result = cursor.fetchone()
+        
+        return (result[0], json.loads(result[1])) if result else None
+
+def save_cached_stock_metrics(ticker, metrics, conn=None):
+    """Store metrics for a ticker and return the time they were stored."""
+    conn = conn or _get_conn()
+    fetched_at = time.time()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "INSERT OR REPLACE INTO stock_metrics_cache (ticker, metrics, fetched_at) VALUES (?, ?, ?)",
+            (ticker, json.dumps(metrics), fetched_at)
         )
     
-    insights = []
-    for row in cursor.fetchall():
-        insight_type, content, generated_at = row
-        
-        # Convert JSON strings back to Python objects if needed
-        try:
-            content_parsed = json.loads(content)
-        except (json.JSONDecodeError, TypeError):
-            content_parsed = content
-        
-        insights.append({
-            'type': insight_type,
-            'content': content_parsed,
-            'generated_at': generated_at
-        })
-    
-    conn.close()
-    return insights
\ No newline at end of file
+    return fetched_at
+
+def delete_cached_stock_metrics(ticker=None, conn=None):
+    """Remove stored metrics for a ticker, or for every ticker if none is given."""
+    conn = conn or _get_conn()
+    with _db_lock, conn:
+        cursor = conn.cursor()
+        
+        if ticker is None:
+            cursor.execute("DELETE FROM stock_metrics_cache")
+        else:
+            cursor.execute("DELETE FROM stock_metrics_cache WHERE ticker = ?", (ticker,))
@@ -1,8 +1,63 @@
-import plotly.express as px
-import plotly.graph_objects as go
+# plotly is imported inside the chart functions so that importing this module
+# doesn't pay plotly's import cost until a chart is actually built
 import pandas as pd
 import numpy as np
 
+from data_processing import calculate_investment_returns_curve
+
+# Expense trend lines with more points than this are rendered with WebGL instead of SVG
+WEBGL_POINT_THRESHOLD = 500
+
+# Constant uirevision so a rerun that redraws a chart keeps the user's zoom and
+# legend state instead of re-initialising the plot
+UIREVISION = "artha"
+
+# Expense histories longer than this are downsampled with LTTB before plotting
+TREND_MAX_POINTS = 2000
+
+def _lttb_indices(x, y, n_out):
+    """
+    Pick n_out points that preserve the shape of a line (Largest-Triangle-Three-Buckets).
+    
+    Args:
+        x (numpy.ndarray): Increasing x values as floats
+        y (numpy.ndarray): y values
+        n_out (int): Number of points to keep
+        
+    Returns:
+        numpy.ndarray: Indices of the kept points, in order
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # The first and last points are always kept; the rest are split into
+    # n_out - 2 buckets that each contribute one point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        
+        # Average of the next bucket (the last point, for the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        # Keep the point forming the largest triangle with the previously kept
+        # point and the next bucket's average
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(area.argmax())
+        indices[i + 1] = selected
+    
+    return indices
+
 def create_expense_pie_chart(expenses):
     """
     Create a pie chart of expenses by category.
@@ -13,6 +68,9 @@ def create_expense_pie_chart(expenses):
     Returns:
         plotly.graph_objects.Figure: Pie chart figure
     """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
     if not expenses:
         # Create empty figure with message
         fig = go.Figure()
@@ -40,7 +98,8 @@ def create_expense_pie_chart(expenses):
     fig.update_traces(textposition='inside', textinfo='percent+label')
     fig.update_layout(
         legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
-        margin=dict(t=30, b=0, l=0, r=0)
+        margin=dict(t=30, b=0, l=0, r=0),
+        uirevision=UIREVISION
     )
     
     return fig
@@ -57,24 +116,21 @@ def create_income_expense_bar_chart(income, total_expenses, remaining):
     Returns:
         plotly.graph_objects.Figure: Bar chart figure
     """
+    import plotly.graph_objects as go
+    
     # Create data for bar chart
     categories = ['Income', 'Expenses', 'Remaining']
     amounts = [income, total_expenses, remaining]
     colors = ['#4CAF50', '#F44336', '#2196F3']
     
-    # Create bar chart
-    fig = go.Figure()
-    
-    # Add bars
-    for i, (category, amount, color) in enumerate(zip(categories, amounts, colors)):
-        fig.add_trace(go.Bar(
-            x=[category],
-            y=[amount],
-            name=category,
-            marker_color=color,
-            text=f"Rs{amount:,.2f}",
-            textposition='auto'
-        ))
+    # Create bar chart with all bars in a single trace
+    fig = go.Figure(go.Bar(
+        x=categories,
+        y=amounts,
+        marker_color=colors,
+        text=[f"Rs{amount:,.2f}" for amount in amounts],
+        textposition='auto'
+    ))
     
     # Update layout
     fig.update_layout(
@@ -84,7 +140,8 @@ def create_income_expense_bar_chart(income, total_expenses, remaining):
             gridcolor='rgba(0,0,0,0.1)'
         ),
         plot_bgcolor='rgba(0,0,0,0)',
-        margin=dict(t=30, l=0, r=0, b=0)
+        margin=dict(t=30, l=0, r=0, b=0),
+        uirevision=UIREVISION
     )
     
     return fig
@@ -102,44 +159,20 @@ def create_investment_growth_chart(initial_investment, monthly_contribution, yea
     Returns:
         plotly.graph_objects.Figure: Line chart figure
     """
-    # Generate data points for each year
-    data = []
-    
-    # Monthly rate
-    monthly_rate = rate_of_return / 12
-    
-    # Initialize variables
-    current_value = initial_investment
-    total_contributions = initial_investment
-    
-    # Add initial point
-    data.append({
-        'year': 0,
-        'value': current_value,
-        'contributions': total_contributions,
-        'earnings': 0
-    })
+    import plotly.graph_objects as go
     
-    # Calculate for each year
-    for year in range(1, years + 1):
-        # Calculate value after this year
-        for _ in range(12):  # 12 months in a year
-            current_value = current_value * (1 + monthly_rate) + monthly_contribution
-            total_contributions += monthly_contribution
-        
-        # Calculate earnings
-        earnings = current_value - total_contributions
-        
-        # Add data point
-        data.append({
-            'year': year,
-            'value': current_value,
-            'contributions': total_contributions,
-            'earnings': earnings
-        })
+    # Month-by-month values from the closed-form compounding formula
+    values, contributions = calculate_investment_returns_curve(
+        initial_investment, monthly_contribution, years, rate_of_return
+    )
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+    # Sample at the end of each year
+    df = pd.DataFrame({
+        'year': np.arange(years + 1),
+        'value': values[::12],
+        'contributions': contributions[::12],
+        'earnings': values[::12] - contributions[::12]
+    })
     
     # Create figure
     fig = go.Figure()
@@ -182,7 +215,8 @@ def create_investment_growth_chart(initial_investment, monthly_contribution, yea
             x=0.5
         ),
         plot_bgcolor='rgba(0,0,0,0)',
-        hovermode="x unified"
+        hovermode="closest",
+        uirevision=UIREVISION
     )
     
     return fig
@@ -197,6 +231,9 @@ def create_expense_trend_chart(expense_history):
     Returns:
         plotly.graph_objects.Figure: Line chart figure
     """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
     if not expense_history:
         # Create empty figure with message
         fig = go.Figure()
@@ -207,17 +244,24 @@ def create_expense_trend_chart(expense_history):
         )
         return fig
     
-    # Convert to DataFrame
+    # Convert to DataFrame with explicit column types
     dates = list(expense_history.keys())
     amounts = list(expense_history.values())
     
     df = pd.DataFrame({
-        'date': pd.to_datetime(dates),
-        'amount': amounts
+        'date': pd.DatetimeIndex(dates),
+        'amount': np.fromiter(amounts, dtype=np.float64, count=len(amounts))
     })
     
-    # Sort by date
-    df = df.sort_values('date')
+    # Sort by date, unless the history is already in order
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date')
+    
+    # Downsample very long histories so the browser isn't sent every point,
+    # keeping the peaks and troughs that define the line's shape
+    if len(df) > TREND_MAX_POINTS:
+        x = df['date'].to_numpy().astype(np.int64).astype(np.float64)
+        df = df.iloc[_lttb_indices(x, df['amount'].to_numpy(), TREND_MAX_POINTS)]
     
     # Create line chart
     fig = px.line(
@@ -225,7 +269,8 @@ def create_expense_trend_chart(expense_history):
         x='date',
         y='amount',
         title="Expense Trend Over Time",
-        markers=True
+        markers=True,
+        render_mode='webgl' if len(df) > WEBGL_POINT_THRESHOLD else 'svg'
     )
     
     # Update layout
@@ -239,7 +284,8 @@ def create_expense_trend_chart(expense_history):
             gridcolor='rgba(0,0,0,0.1)'
         ),
         plot_bgcolor='rgba(0,0,0,0)',
-        hovermode="x unified"
+        hovermode="closest",
+        uirevision=UIREVISION
     )
     
     return fig
@@ -255,6 +301,8 @@ def create_savings_goal_progress_chart(goals, current_savings):
     Returns:
         plotly.graph_objects.Figure: Progress chart figure
     """
+    import plotly.graph_objects as go
+    
     if not goals or not current_savings:
         # Create empty figure with message
         fig = go.Figure()
@@ -280,40 +328,40 @@ def create_savings_goal_progress_chart(goals, current_savings):
         current_amounts.append(current)
         percentages.append(percentage)
     
-    # Create progress bars
+    # Create progress bars: one trace for all targets, one for all current amounts
     fig = go.Figure()
     
-    for i, goal in enumerate(goal_names):
-        # Add target amount (full bar)
-        fig.add_trace(go.Bar(
-            x=[target_amounts[i]],
-            y=[goal],
-            orientation='h',
-            name=f"{goal} (Target)",
-            marker=dict(
-                color='rgba(0, 0, 0, 0.1)',
-                line=dict(color='rgba(0, 0, 0, 0.2)', width=1)
-            ),
-            showlegend=False,
-            hovertemplate=f"Target: Rs.{target_amounts[i]:,.2f}<extra></extra>"
-        ))
-        
-        # Add current amount (progress)
-        fig.add_trace(go.Bar(
-            x=[current_amounts[i]],
-            y=[goal],
-            orientation='h',
-            name=f"{goal} (Current)",
-            marker=dict(
-                color='#4CAF50',
-                line=dict(color='#2E7D32', width=1)
-            ),
-            text=f"{percentages[i]:.1f}%",
-            textposition='inside',
-            insidetextanchor='middle',
-            showlegend=False,
-            hovertemplate=f"Current: Rs.{current_amounts[i]:,.2f} ({percentages[i]:.1f}%)<extra></extra>"
-        ))
+    # Add target amounts (full bars)
+    fig.add_trace(go.Bar(
+        x=target_amounts,
+        y=goal_names,
+        orientation='h',
+        name="Target",
+        marker=dict(
+            color='rgba(0, 0, 0, 0.1)',
+            line=dict(color='rgba(0, 0, 0, 0.2)', width=1)
+        ),
+        showlegend=False,
+        hovertemplate="Target: Rs.%{x:,.2f}<extra></extra>"
+    ))
+    
+    # Add current amounts (progress)
+    fig.add_trace(go.Bar(
+        x=current_amounts,
+        y=goal_names,
+        orientation='h',
+        name="Current",
+        marker=dict(
+            color='#4CAF50',
+            line=dict(color='#2E7D32', width=1)
+        ),
+        text=[f"{percentage:.1f}%" for percentage in percentages],
+        textposition='inside',
+        insidetextanchor='middle',
+        customdata=percentages,
+        showlegend=False,
+        hovertemplate="Current: Rs.%{x:,.2f} (%{customdata:.1f}%)<extra></extra>"
+    ))
     
     # Update layout
     fig.update_layout(
@@ -328,7 +376,8 @@ def create_savings_goal_progress_chart(goals, current_savings):
             gridcolor='rgba(0,0,0,0.1)'
         ),
         plot_bgcolor='rgba(0,0,0,0)',
-        hovermode="closest"
+        hovermode="closest",
+        uirevision=UIREVISION
     )
     
     return fig
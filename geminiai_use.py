@@ -1,7 +1,11 @@
 import os
 import json
+import hashlib
+import streamlit as st
 import google.generativeai as genai
 
+from database import get_cached_ai_response, save_cached_ai_response
+
 # Get the Gemini API key from environment variables
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
@@ -27,32 +31,77 @@ safety_settings = [
     {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
 ]
 
-model = genai.GenerativeModel(
-    model_name="gemini-1.5-flash",
-    generation_config=generation_config,
-    safety_settings=safety_settings,
-)
+# Seconds a model response is reused, in memory and in the database
+AI_RESPONSE_TTL = 60 * 60
+
+# Structure Gemini must follow when returning a budget analysis
+budget_analysis_schema = {
+    "type": "object",
+    "properties": {
+        "overall_analysis": {"type": "string"},
+        "recommendations": {"type": "string"},
+        "improvements": {"type": "string"},
+        "expense_breakdown": {"type": "string"},
+    },
+    "required": ["overall_analysis", "recommendations", "improvements", "expense_breakdown"],
+}
+
+json_generation_config = {
+    **generation_config,
+    "response_mime_type": "application/json",
+    "response_schema": budget_analysis_schema,
+}
 
 system_prompt = """
 You are a helpful financial advisor named ARTHA. You are an expert in personal finance, budgeting, and investment.
 Provide clear, concise, and actionable advice.
 """
 
+# The system prompt is part of the model so it isn't resent with every request
+model = genai.GenerativeModel(
+    model_name="gemini-1.5-flash",
+    generation_config=generation_config,
+    safety_settings=safety_settings,
+    system_instruction=system_prompt,
+)
+
 def generate_financial_adivice(query, financial_content=None):
     """Generates financial advice based on the user's query and optional financial context."""
-    chat = model.start_chat(history=[])
-    chat.send_message(system_prompt)
-
+    # Send the context and the question together in a single request
+    prompt = query
     if financial_content:
-        context_message = f"Financial Content: {financial_content}"
-        chat.send_message(context_message)
+        prompt = f"Financial Content: {financial_content}\n\nUser: {query}"
 
-    chat.send_message(query)
-    try:
-        response = chat.last.text
-        return response
-    except Exception as e:
-        return f"An error occurred: {e}"
+    # Errors propagate so the caller can decide how to show them
+    return model.generate_content(prompt).text
+
+@st.cache_data(ttl=AI_RESPONSE_TTL, show_spinner=False)
+def _generate_text(prompt, json_mode=False):
+    """
+    Generate a response for a prompt, cached so identical prompts skip the API call.
+    
+    Responses are also stored in the database by prompt hash so they survive restarts,
+    and both caches expire after AI_RESPONSE_TTL seconds.
+    With json_mode, Gemini is asked for JSON matching budget_analysis_schema, and a
+    reply that doesn't parse raises instead of being cached.
+    """
+    key = f"json:{prompt}" if json_mode else prompt
+    prompt_hash = hashlib.blake2b(key.encode("utf-8"), digest_size=32).hexdigest()
+    
+    cached = get_cached_ai_response(prompt_hash, AI_RESPONSE_TTL)
+    if cached is not None:
+        return cached
+    
+    config = json_generation_config if json_mode else None
+    response = model.generate_content(prompt, generation_config=config)
+    text = response.text
+    
+    # A truncated reply would otherwise be served from the cache until it expires
+    if json_mode:
+        json.loads(text)
+    
+    save_cached_ai_response(prompt_hash, text)
+    return text
 
 def analyze_budget(income, expenses):
     """Analyzes the user's budget and provides recommendations."""
@@ -66,20 +115,11 @@ def analyze_budget(income, expenses):
     2. Specific recommendations for improvement.
     3. Areas where the user can potentially save more.
     4. A breakdown of the expenses.
-    Budget Data: {json.dumps(budget_data, indent=2)}
-    Return in JSON format with keys overall_analysis, recommendations, improvements, expense_breakdown .
+    Budget Data: {json.dumps(budget_data, indent=2, sort_keys=True)}
     """
     try:
-        response = model.generate_content(prompt)
-        try:
-            # Attempt to load the JSON
-            json_response = json.loads(response.text)
-            return json.dumps(json_response)
-        except json.JSONDecodeError:
-           # If not valid JSON, return a fallback message or the raw text
-           print("Not valid json")
-           return response.text
-           
+        # JSON mode guarantees a parseable response, so no fallback is needed
+        return json.loads(_generate_text(prompt, json_mode=True))
     except Exception as e:
         return f"An error occurred: {e}"
 
@@ -92,12 +132,11 @@ def investement_advise(risk_involved, investment_horizon, current_investments=No
     }
     prompt = f"""
     Provide investment advice based on the following information:
-    {json.dumps(investemnt_data, indent=2)}
+    {json.dumps(investemnt_data, indent=2, sort_keys=True)}
     Consider the risk involved, investment horizon, and current investments.
     """
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return _generate_text(prompt)
     except Exception as e:
         return f"An error occurred: {e}"
 
@@ -1,6 +1,43 @@
+import copy
+import math
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+from database import get_cached_stock_metrics, save_cached_stock_metrics, delete_cached_stock_metrics
+
+# numba is optional: without it the numeric kernels run as plain Python.
+# Kernels use cache=True, so compiled code is written next to the module
+# and later processes load it instead of compiling again.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# The only history columns get_stock_metrics reads
+HISTORY_COLUMNS = ['Close', 'High', 'Low']
+
+# Connections kept open to Yahoo Finance, enough for get_stock_metrics_many's default workers
+HTTP_POOL_SIZE = 32
+
+# Trading days of history needed for the 1-month, 3-month and 1-year returns,
+# and the position of the starting price for each (the 1-year return starts
+# at the first day of the history)
+RETURN_WINDOWS = np.array([21, 63, 252])
+RETURN_LOOKBACK_INDEX = np.array([-21, -63, 0])
+
+# Seconds that stock metrics are reused before being fetched again
+STOCK_METRICS_TTL = 15 * 60
+
+# In-memory stock metrics keyed by ticker as (fetched_at, metrics), bounded to this many tickers
+STOCK_METRICS_CACHE_SIZE = 512
+_stock_metrics_cache = {}
 
 def calculate_net_worth(assets, liabilities):
     """
@@ -13,8 +50,17 @@ def calculate_net_worth(assets, liabilities):
     Returns:
         tuple: (net_worth, assets_total, liabilities_total)
     """
-    assets_total = sum(assets.values()) if assets else 0
-    liabilities_total = sum(liabilities.values()) if liabilities else 0
+    return _net_worth(
+        tuple(assets.values()) if assets else (),
+        tuple(liabilities.values()) if liabilities else ()
+    )
+
+@lru_cache(maxsize=128)
+def _net_worth(asset_values, liability_values):
+    """Memoized core of calculate_net_worth keyed on hashable value tuples."""
+    # Reduce in C rather than boxing each value through sum()
+    assets_total = float(np.fromiter(asset_values, dtype=np.float64, count=len(asset_values)).sum()) if asset_values else 0.0
+    liabilities_total = float(np.fromiter(liability_values, dtype=np.float64, count=len(liability_values)).sum()) if liability_values else 0.0
     net_worth = assets_total - liabilities_total
     
     return net_worth, assets_total, liabilities_total
@@ -29,12 +75,15 @@ def calculate_debt_to_income_ratio(monthly_debt_payments, monthly_income):
         
     Returns:
         float: Debt-to-income ratio as a decimal
+    
+    A single division; inline it in hot loops, or use calculate_ratios_vec.
     """
     if monthly_income <= 0:
         return None
     
     return monthly_debt_payments / monthly_income
 
+@lru_cache(maxsize=128)
 def calculate_emergency_fund_ratio(emergency_fund, monthly_expenses):
     """
     Calculate emergency fund ratio (months of expenses covered).
@@ -45,12 +94,41 @@ def calculate_emergency_fund_ratio(emergency_fund, monthly_expenses):
         
     Returns:
         float: Number of months covered by emergency fund
+    
+    A single division; inline it in hot loops, or use calculate_ratios_vec.
     """
     if monthly_expenses <= 0:
         return None
     
     return emergency_fund / monthly_expenses
 
+def calculate_ratios_vec(monthly_debt_payments, monthly_income, emergency_fund, monthly_expenses):
+    """
+    Calculate debt-to-income and emergency fund ratios for arrays of inputs.
+    
+    Vectorized form of calculate_debt_to_income_ratio and
+    calculate_emergency_fund_ratio for sweeps; entries the scalar versions
+    would return None for are NaN.
+    
+    Args:
+        monthly_debt_payments (numpy.ndarray): Total monthly debt payments
+        monthly_income (numpy.ndarray): Monthly income
+        emergency_fund (numpy.ndarray): Emergency fund amount
+        monthly_expenses (numpy.ndarray): Monthly expenses
+        
+    Returns:
+        tuple: (debt_to_income, emergency_fund_ratio) arrays
+    """
+    monthly_income = np.asarray(monthly_income, dtype=np.float64)
+    monthly_expenses = np.asarray(monthly_expenses, dtype=np.float64)
+    has_income = monthly_income > 0
+    has_expenses = monthly_expenses > 0
+    
+    debt_to_income = np.where(has_income, monthly_debt_payments / np.where(has_income, monthly_income, 1.0), np.nan)
+    emergency_fund_ratio = np.where(has_expenses, emergency_fund / np.where(has_expenses, monthly_expenses, 1.0), np.nan)
+    
+    return debt_to_income, emergency_fund_ratio
+
 def analyze_retirement_readiness(current_age, retirement_age, life_expectancy, 
                                current_savings, monthly_contribution, expected_return,
                                desired_retirement_income):
@@ -69,53 +147,118 @@ def analyze_retirement_readiness(current_age, retirement_age, life_expectancy,
     Returns:
         dict: Retirement analysis
     """
-    try:
-        # Years until retirement
-        years_until_retirement = retirement_age - current_age
-        
-        # Years in retirement
-        retirement_years = life_expectancy - retirement_age
-        
-        # Calculate future value of current savings at retirement
-        future_value_current_savings = current_savings * (1 + expected_return) ** years_until_retirement
-        
-        # Calculate future value of monthly contributions
-        monthly_return = expected_return / 12
-        months_until_retirement = years_until_retirement * 12
-        
-        future_value_contributions = 0
-        if monthly_return > 0:
-            future_value_contributions = monthly_contribution * (((1 + monthly_return) ** months_until_retirement - 1) / monthly_return)
-        else:
-            future_value_contributions = monthly_contribution * months_until_retirement
-        
-        # Total projected savings at retirement
-        projected_savings = future_value_current_savings + future_value_contributions
-        
-        # Calculate sustainable annual withdrawal (using 4% rule as a simple starting point)
-        sustainable_withdrawal_rate = 0.04
-        sustainable_annual_income = projected_savings * sustainable_withdrawal_rate
-        
-        # Calculate retirement income gap
-        income_gap = desired_retirement_income - sustainable_annual_income
-        income_gap_percentage = (income_gap / desired_retirement_income) * 100 if desired_retirement_income > 0 else 0
-        
-        # Determine if on track
-        on_track = sustainable_annual_income >= desired_retirement_income
-        
-        # Return analysis
-        return {
-            "years_until_retirement": years_until_retirement,
-            "retirement_years": retirement_years,
-            "projected_savings": projected_savings,
-            "sustainable_annual_income": sustainable_annual_income,
-            "income_gap": income_gap,
-            "income_gap_percentage": income_gap_percentage,
-            "on_track": on_track
-        }
+    if retirement_age < current_age:
+        return {"error": "Error analyzing retirement readiness: retirement age is before current age"}
     
-    except Exception as e:
-        return {"error": f"Error analyzing retirement readiness: {str(e)}"}
+    projected_savings, sustainable_annual_income, income_gap, income_gap_percentage = _retirement_core(
+        current_age, retirement_age, current_savings, monthly_contribution,
+        expected_return, desired_retirement_income
+    )
+    
+    # Return analysis
+    return {
+        "years_until_retirement": retirement_age - current_age,
+        "retirement_years": life_expectancy - retirement_age,
+        "projected_savings": projected_savings,
+        "sustainable_annual_income": sustainable_annual_income,
+        "income_gap": income_gap,
+        "income_gap_percentage": income_gap_percentage,
+        "on_track": sustainable_annual_income >= desired_retirement_income
+    }
+
+def analyze_retirement_readiness_vec(current_age, retirement_age, life_expectancy,
+                                     current_savings, monthly_contribution, expected_return,
+                                     desired_retirement_income):
+    """
+    Analyze retirement readiness for many scenarios at once.
+    
+    Takes the same arguments as analyze_retirement_readiness, but each may be a
+    NumPy array; arrays are broadcast against each other, so a grid of ages,
+    returns or contributions is evaluated without a Python loop.
+    
+    Returns:
+        dict: Retirement analysis with an array for each field
+    """
+    current_age = np.asarray(current_age)
+    retirement_age = np.asarray(retirement_age)
+    life_expectancy = np.asarray(life_expectancy)
+    current_savings = np.asarray(current_savings, dtype=np.float64)
+    monthly_contribution = np.asarray(monthly_contribution, dtype=np.float64)
+    expected_return = np.asarray(expected_return, dtype=np.float64)
+    desired_retirement_income = np.asarray(desired_retirement_income, dtype=np.float64)
+    
+    years_until_retirement = retirement_age - current_age
+    retirement_years = life_expectancy - retirement_age
+    
+    # Future value of current savings and of the monthly contributions
+    future_value_current_savings = current_savings * (1 + expected_return) ** years_until_retirement
+    
+    monthly_return = expected_return / 12
+    months_until_retirement = years_until_retirement * 12
+    positive_return = monthly_return > 0
+    
+    # Zero-return scenarios divide by 1 and are then replaced by the linear sum
+    growth = (1 + monthly_return) ** months_until_retirement
+    future_value_contributions = np.where(
+        positive_return,
+        monthly_contribution * (growth - 1) / np.where(positive_return, monthly_return, 1.0),
+        monthly_contribution * months_until_retirement
+    )
+    
+    projected_savings = future_value_current_savings + future_value_contributions
+    
+    # 4% rule, as in analyze_retirement_readiness
+    sustainable_annual_income = projected_savings * 0.04
+    
+    income_gap = desired_retirement_income - sustainable_annual_income
+    has_target = desired_retirement_income > 0
+    income_gap_percentage = np.where(
+        has_target,
+        income_gap / np.where(has_target, desired_retirement_income, 1.0) * 100,
+        0.0
+    )
+    
+    return {
+        "years_until_retirement": years_until_retirement,
+        "retirement_years": retirement_years,
+        "projected_savings": projected_savings,
+        "sustainable_annual_income": sustainable_annual_income,
+        "income_gap": income_gap,
+        "income_gap_percentage": income_gap_percentage,
+        "on_track": sustainable_annual_income >= desired_retirement_income
+    }
+
+@njit(cache=True, fastmath=True)
+def _retirement_core(current_age, retirement_age, current_savings, monthly_contribution,
+                     expected_return, desired_retirement_income):
+    """Numeric core of analyze_retirement_readiness, compiled with numba when available."""
+    # Years until retirement
+    years_until_retirement = retirement_age - current_age
+    
+    # Calculate future value of current savings at retirement
+    future_value_current_savings = current_savings * (1 + expected_return) ** years_until_retirement
+    
+    # Calculate future value of monthly contributions
+    monthly_return = expected_return / 12
+    months_until_retirement = years_until_retirement * 12
+    
+    if monthly_return > 0:
+        future_value_contributions = monthly_contribution * (((1 + monthly_return) ** months_until_retirement - 1) / monthly_return)
+    else:
+        future_value_contributions = monthly_contribution * months_until_retirement
+    
+    # Total projected savings at retirement
+    projected_savings = future_value_current_savings + future_value_contributions
+    
+    # Calculate sustainable annual withdrawal (using 4% rule as a simple starting point)
+    sustainable_withdrawal_rate = 0.04
+    sustainable_annual_income = projected_savings * sustainable_withdrawal_rate
+    
+    # Calculate retirement income gap
+    income_gap = desired_retirement_income - sustainable_annual_income
+    income_gap_percentage = (income_gap / desired_retirement_income) * 100 if desired_retirement_income > 0 else 0.0
+    
+    return projected_savings, sustainable_annual_income, income_gap, income_gap_percentage
 
 def analyze_mortgage_affordability(income, debt, down_payment, interest_rate, term_years, property_tax_rate=0.01, insurance=100, pmi_rate=0.005):
     """
@@ -134,159 +277,444 @@ def analyze_mortgage_affordability(income, debt, down_payment, interest_rate, te
     Returns:
         dict: Mortgage affordability analysis
     """
-    try:
-        # Monthly income
-        monthly_income = income / 12
-        
-        # Calculate maximum housing payment (using 28/36 rule)
-        # Front-end ratio: Housing costs should be less than 28% of gross monthly income
-        front_end_max = monthly_income * 0.28
-        
-        # Back-end ratio: Total debt payments (including housing) should be less than 36% of gross monthly income
-        back_end_max = monthly_income * 0.36 - debt
-        
-        # Use the more conservative of the two
-        max_housing_payment = min(front_end_max, back_end_max)
-        
-        # Calculate monthly mortgage payment for various home prices
-        monthly_rate = interest_rate / 12
-        total_payments = term_years * 12
-        
-        price_ranges = []
-        max_price = 0
-        
-        for price_multiple in range(1, 16):
-            home_price = price_multiple * 50000  # $50K increments
-            
-            # Calculate loan amount
-            loan_amount = home_price - down_payment
-            
-            if loan_amount <= 0:
-                continue
-                
-            # Check if PMI is required (down payment < 20%)
-            pmi_required = down_payment / home_price < 0.2
-            monthly_pmi = (loan_amount * pmi_rate / 12) if pmi_required else 0
-            
-            # Calculate mortgage payment
-            if monthly_rate == 0:
-                monthly_mortgage = loan_amount / total_payments
-            else:
-                monthly_mortgage = loan_amount * (monthly_rate * (1 + monthly_rate) ** total_payments) / ((1 + monthly_rate) ** total_payments - 1)
-            
-            # Add property tax and insurance
-            monthly_tax = (home_price * property_tax_rate) / 12
-            monthly_total = monthly_mortgage + monthly_tax + insurance + monthly_pmi
-            
-            # Check if affordable
-            affordable = monthly_total <= max_housing_payment
-            
-            # Store the result
-            price_ranges.append({
-                "home_price": home_price,
-                "monthly_payment": monthly_total,
-                "affordable": affordable,
-                "details": {
-                    "mortgage": monthly_mortgage,
-                    "property_tax": monthly_tax,
-                    "insurance": insurance,
-                    "pmi": monthly_pmi
-                }
-            })
-            
-            # Update max affordable price
-            if affordable:
-                max_price = home_price
-        
-        # Return analysis
-        return {
-            "max_housing_payment": max_housing_payment,
-            "max_affordable_price": max_price,
-            "price_ranges": price_ranges
+    if term_years <= 0:
+        return {"error": "Error analyzing mortgage affordability: term must be at least one year"}
+    
+    # Monthly income
+    monthly_income = income / 12
+    
+    # Calculate maximum housing payment (using 28/36 rule)
+    # Front-end ratio: Housing costs should be less than 28% of gross monthly income
+    front_end_max = monthly_income * 0.28
+    
+    # Back-end ratio: Total debt payments (including housing) should be less than 36% of gross monthly income
+    back_end_max = monthly_income * 0.36 - debt
+    
+    # Use the more conservative of the two
+    max_housing_payment = min(front_end_max, back_end_max)
+    
+    # Calculate monthly mortgage payment for various home prices
+    monthly_rate = interest_rate / 12
+    total_payments = term_years * 12
+    
+    # All price points at once, in $50K increments
+    home_price = np.arange(1, 16) * 50000.0
+    
+    # Calculate loan amount, skipping prices the down payment already covers
+    loan_amount = home_price - down_payment
+    financed = loan_amount > 0
+    home_price = home_price[financed]
+    loan_amount = loan_amount[financed]
+    
+    # PMI is required when the down payment is under 20%
+    pmi_required = (down_payment / home_price) < 0.2
+    monthly_pmi = np.where(pmi_required, loan_amount * pmi_rate / 12, 0.0)
+    
+    # Calculate mortgage payment; the payment per unit of loan depends
+    # only on the rate and term, so it is computed once
+    if monthly_rate == 0:
+        annuity_coef = 1.0 / total_payments
+    else:
+        pow_factor = _ipow(1.0 + monthly_rate, total_payments)
+        annuity_coef = monthly_rate * pow_factor / (pow_factor - 1.0)
+    monthly_mortgage = loan_amount * annuity_coef
+    
+    # Add property tax and insurance
+    monthly_tax = home_price * (property_tax_rate / 12)
+    monthly_total = monthly_mortgage + monthly_tax + insurance + monthly_pmi
+    
+    # Check if affordable
+    affordable = monthly_total <= max_housing_payment
+    
+    # The grid above is only a table; the exact maximum is found by bisection
+    max_price = _max_affordable_price(
+        max_housing_payment, down_payment, annuity_coef,
+        property_tax_rate, insurance, pmi_rate
+    )
+    
+    price_ranges = [
+        {
+            "home_price": int(price),
+            "monthly_payment": total,
+            "affordable": is_affordable,
+            "details": {
+                "mortgage": mortgage,
+                "property_tax": tax,
+                "insurance": insurance,
+                "pmi": pmi
+            }
         }
+        for price, total, is_affordable, mortgage, tax, pmi in zip(
+            home_price.tolist(), monthly_total.tolist(), affordable.tolist(),
+            monthly_mortgage.tolist(), monthly_tax.tolist(), monthly_pmi.tolist()
+        )
+    ]
     
-    except Exception as e:
-        return {"error": f"Error analyzing mortgage affordability: {str(e)}"}
+    # Return analysis
+    return {
+        "max_housing_payment": max_housing_payment,
+        "max_affordable_price": max_price,
+        "price_ranges": price_ranges
+    }
+
+def _monthly_housing_cost(home_price, down_payment, annuity_coef, property_tax_rate, insurance, pmi_rate):
+    """Monthly mortgage, property tax, insurance and PMI for one home price."""
+    loan_amount = home_price - down_payment
+    monthly_pmi = loan_amount * pmi_rate / 12 if down_payment / home_price < 0.2 else 0.0
+    return loan_amount * annuity_coef + home_price * (property_tax_rate / 12) + insurance + monthly_pmi
 
-def get_stock_metrics(ticker):
+def _max_affordable_price(max_housing_payment, down_payment, annuity_coef, property_tax_rate, insurance, pmi_rate):
+    """
+    Find the highest financed home price whose monthly cost fits the budget, to the cent.
+    
+    The monthly cost only grows with the price, so the affordable prices
+    form an interval above the down payment and bisection converges on its end.
+    
+    Returns:
+        float: Maximum affordable price, or 0 if no financed price is affordable
+    """
+    cost_args = (down_payment, annuity_coef, property_tax_rate, insurance, pmi_rate)
+    
+    # Even the smallest loan is over budget
+    lo = down_payment + 0.01
+    if max_housing_payment <= 0 or _monthly_housing_cost(lo, *cost_args) > max_housing_payment:
+        return 0
+    
+    # The mortgage alone reaches the budget at this price, so it bounds the answer
+    hi = down_payment + max_housing_payment / annuity_coef
+    if _monthly_housing_cost(hi, *cost_args) <= max_housing_payment:
+        return math.floor(hi * 100) / 100
+    
+    while hi - lo > 0.01:
+        mid = (lo + hi) / 2
+        if _monthly_housing_cost(mid, *cost_args) <= max_housing_payment:
+            lo = mid
+        else:
+            hi = mid
+    
+    # Round down so the reported price is still affordable
+    return math.floor(lo * 100) / 100
+
+def _ipow(base, exp):
+    """
+    Raise base to a non-negative integer power by repeated squaring.
+    
+    Takes about log2(exp) multiplies instead of a libm pow call; other
+    exponents fall back to the ** operator.
+    """
+    if not isinstance(exp, int) or exp < 0:
+        return base ** exp
+    
+    result = 1.0
+    while exp:
+        if exp & 1:
+            result *= base
+        base *= base
+        exp >>= 1
+    return result
+
+def get_stock_metrics(ticker, include_fundamentals=False):
     """
     Get key metrics for a stock.
     
+    Metrics are reused for STOCK_METRICS_TTL seconds, from memory or from the
+    database, before Yahoo Finance is queried again. Errors are not cached.
+    
     Args:
         ticker (str): Stock ticker symbol
+        include_fundamentals (bool): Also return name, pe_ratio and dividend_yield,
+            which need the much larger info request
         
     Returns:
         dict: Stock metrics
     """
-    try:
-        # Get stock data
-        stock = yf.Ticker(ticker)
-        
-        # Basic info
-        info = stock.info
-        
-        # Get historical data for returns calculation
-        hist = stock.history(period="1y")
-        
-        if hist.empty:
-            return {"error": f"Could not retrieve data for ticker symbol: {ticker}"}
-        
-        # Calculate returns
-        current_price = hist['Close'].iloc[-1]
-        
-        # Get 52-week high and low
-        price_52wk_high = hist['High'].max()
-        price_52wk_low = hist['Low'].min()
-        
-        # Calculate 1-month return
-        if len(hist) >= 21:  # Approximately 1 month of trading days
-            price_1mo_ago = hist['Close'].iloc[-21]
-            return_1mo = ((current_price / price_1mo_ago) - 1) * 100
-        else:
-            return_1mo = None
-        
-        # Calculate 3-month return
-        if len(hist) >= 63:  # Approximately 3 months of trading days
-            price_3mo_ago = hist['Close'].iloc[-63]
-            return_3mo = ((current_price / price_3mo_ago) - 1) * 100
-        else:
-            return_3mo = None
+    metrics = _cached_stock_metrics(ticker, include_fundamentals)
+    if metrics is None:
+        metrics = _fetch_stock_metrics(ticker, include_fundamentals=include_fundamentals)
+        if "error" not in metrics:
+            _store_stock_metrics(ticker, metrics)
+            metrics = copy.deepcopy(metrics)
+    
+    return metrics
+
+def get_stock_metrics_many(tickers, max_workers=16, include_fundamentals=False):
+    """
+    Get key metrics for several stocks at once.
+    
+    Price histories for uncached tickers come from one batched download, and
+    any per-ticker requests (info, or a history missing from the batch) run
+    concurrently.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        max_workers (int): Maximum number of concurrent requests
+        include_fundamentals (bool): Also return name, pe_ratio and dividend_yield
         
-        # Calculate 1-year return
-        if len(hist) >= 252:  # Approximately 1 year of trading days
-            price_1yr_ago = hist['Close'].iloc[0]
-            return_1yr = ((current_price / price_1yr_ago) - 1) * 100
+    Returns:
+        dict: Stock metrics by ticker, in the order given
+    """
+    tickers = list(dict.fromkeys(tickers))
+    results = {}
+    missing = []
+    
+    for ticker in tickers:
+        metrics = _cached_stock_metrics(ticker, include_fundamentals)
+        if metrics is None:
+            missing.append(ticker)
         else:
-            return_1yr = None
-        
+            results[ticker] = metrics
+    
+    if missing:
+        # Tickers without a batched history fetch their own
+        try:
+            histories = _download_histories(missing, period="1y", auto_adjust=True, columns=HISTORY_COLUMNS)
+        except _download_errors() as e:
+            print(f"Error in batched stock download, fetching tickers one at a time: {e}")
+            histories = {}
+        
+        def fetch(ticker):
+            return _fetch_stock_metrics(ticker, histories.get(ticker), include_fundamentals)
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+            for ticker, metrics in zip(missing, executor.map(fetch, missing)):
+                if "error" not in metrics:
+                    _store_stock_metrics(ticker, metrics)
+                    metrics = copy.deepcopy(metrics)
+                results[ticker] = metrics
+    
+    return {ticker: results[ticker] for ticker in tickers}
+
+def _cached_stock_metrics(ticker, include_fundamentals=False):
+    """Return a copy of a ticker's cached metrics if they are still fresh and complete enough, else None.
+    
+    The copy is deep so callers can't change the nested returns dict held in the cache.
+    """
+    cached = _stock_metrics_cache.get(ticker)
+    if cached is None or time.time() - cached[0] >= STOCK_METRICS_TTL:
+        # Without the app's database (e.g. initialize_database() never ran)
+        # only the in-memory cache is used
+        try:
+            cached = get_cached_stock_metrics(ticker, STOCK_METRICS_TTL)
+        except sqlite3.Error:
+            cached = None
+        if cached is None:
+            return None
+        _remember_stock_metrics(ticker, cached)
+    
+    # Metrics cached without fundamentals can't answer a request for them
+    if include_fundamentals and "name" not in cached[1]:
+        return None
+    
+    return copy.deepcopy(cached[1])
+
+def _store_stock_metrics(ticker, metrics):
+    """Save freshly fetched metrics to the database, if available, and the in-memory cache."""
+    try:
+        fetched_at = save_cached_stock_metrics(ticker, metrics)
+    except sqlite3.Error:
+        fetched_at = time.time()
+    _remember_stock_metrics(ticker, (fetched_at, metrics))
+
+def _remember_stock_metrics(ticker, entry):
+    """Keep a (fetched_at, metrics) entry in the bounded in-memory cache."""
+    if len(_stock_metrics_cache) >= STOCK_METRICS_CACHE_SIZE:
+        _stock_metrics_cache.clear()
+    _stock_metrics_cache[ticker] = entry
+
+def invalidate_cache(ticker=None):
+    """
+    Drop cached stock metrics so the next request fetches fresh data.
+    
+    Args:
+        ticker (str): Stock ticker symbol, or None to drop every ticker
+    """
+    if ticker is None:
+        _stock_metrics_cache.clear()
+    else:
+        _stock_metrics_cache.pop(ticker, None)
+    try:
+        delete_cached_stock_metrics(ticker)
+    except sqlite3.Error:
+        pass
+    
+    # Ticker objects hold on to the info they fetched, so rebuild them too
+    _ticker.cache_clear()
+
+def _fetch_stock_metrics(ticker, hist=None, include_fundamentals=False):
+    """Fetch key metrics for a stock from Yahoo Finance, bypassing the cache; hist may be a pre-downloaded 1y history."""
+    # Get stock data
+    stock = _ticker(ticker)
+    
+    # Basic info (only when asked for) and historical data for returns calculation
+    try:
+        info = stock.info if include_fundamentals else None
+        if hist is None:
+            hist = stock.history(period="1y", actions=False)
+    except Exception as e:
+        return {"error": f"Error getting stock metrics: {str(e)}"}
+    
+    if hist.empty:
+        return {"error": f"Could not retrieve data for ticker symbol: {ticker}"}
+    
+    # Work on the underlying arrays to skip pandas indexing overhead
+    close = hist['Close'].to_numpy()
+    high = hist['High'].to_numpy()
+    low = hist['Low'].to_numpy()
+    
+    # Calculate returns
+    current_price = close[-1]
+    
+    # Get 52-week high and low
+    price_52wk_high = np.nanmax(high)
+    price_52wk_low = np.nanmin(low)
+    
+    # Calculate 1-month, 3-month and 1-year returns with one gather; each
+    # needs approximately 21, 63 or 252 trading days of history
+    valid = len(close) >= RETURN_WINDOWS
+    past_prices = close[np.where(valid, RETURN_LOOKBACK_INDEX, 0)]
+    returns = ((current_price / past_prices) - 1) * 100
+    return_1mo, return_3mo, return_1yr = [
+        value if is_valid else None
+        for value, is_valid in zip(returns.tolist(), valid.tolist())
+    ]
+    
+    metrics = {
+        "current_price": current_price,
+        "price_52wk_high": price_52wk_high,
+        "price_52wk_low": price_52wk_low,
+        "returns": {
+            "1mo": return_1mo,
+            "3mo": return_3mo,
+            "1yr": return_1yr
+        }
+    }
+    
+    if info is not None:
         # Get company name
-        name = info.get('longName', ticker)
+        metrics["name"] = info.get('longName', ticker)
         
         # Get P/E ratio
-        pe_ratio = info.get('trailingPE', None)
+        metrics["pe_ratio"] = info.get('trailingPE', None)
+        
+        # Get dividend yield as a percentage (missing or None counts as 0)
+        metrics["dividend_yield"] = (info.get('dividendYield') or 0.0) * 100.0
+    
+    # Return metrics
+    return metrics
+
+def _create_session():
+    """
+    Create the HTTP session shared by every Yahoo Finance request.
+    
+    Newer yfinance releases only accept curl_cffi sessions, so one is used
+    when available; otherwise a pooled requests session is used.
+    """
+    try:
+        from curl_cffi import requests as curl_requests
+        return curl_requests.Session(impersonate="chrome")
+    except ImportError:
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        return session
+
+# yfinance and the HTTP session are loaded on first use, so pages that only use
+# the calculators above (such as the Dashboard) don't pay for them
+@lru_cache(maxsize=1)
+def _yfinance():
+    """Import yfinance on first use."""
+    import yfinance
+    return yfinance
+
+# Keep-alive connections are reused across calls instead of a new TLS handshake each time
+@lru_cache(maxsize=1)
+def _session():
+    """Return the shared HTTP session, creating it on first use."""
+    return _create_session()
+
+def _download_errors():
+    """
+    Return the exceptions a failed Yahoo Finance request is expected to raise.
+    
+    requests and curl_cffi network errors are OSErrors, malformed responses
+    raise ValueError, and newer yfinance releases add their own YFException.
+    """
+    yf_exceptions = getattr(_yfinance(), "exceptions", None)
+    yf_error = getattr(yf_exceptions, "YFException", None)
+    return (OSError, ValueError) + ((yf_error,) if yf_error else ())
+
+@lru_cache(maxsize=1024)
+def _ticker(symbol):
+    """Return a shared yfinance Ticker for a symbol instead of building one per call."""
+    return _yfinance().Ticker(symbol, session=_session())
+
+def _download_histories(tickers, period, auto_adjust, columns):
+    """
+    Download price histories for several tickers in one request.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        period (str): Time period (e.g., "1d", "1y")
+        auto_adjust (bool): Whether prices are adjusted for splits and dividends
+        columns (list): Price columns to keep, including 'Close'
         
-        # Get dividend yield
-        dividend_yield = info.get('dividendYield', 0)
-        if dividend_yield:
-            dividend_yield *= 100  # Convert to percentage
+    Returns:
+        dict: History DataFrame by ticker, for tickers that returned data
+    """
+    histories = {}
+    data = _yfinance().download(
+        tickers=" ".join(tickers),
+        period=period,
+        group_by="ticker",
+        threads=True,
+        actions=False,
+        progress=False,
+        auto_adjust=auto_adjust,
+        session=_session()
+    )
+    
+    for ticker in tickers:
+        # Columns are (ticker, field) pairs; older yfinance flattens a single ticker
+        if data.columns.nlevels > 1 and ticker in data.columns.get_level_values(0):
+            hist = data[ticker]
+        elif data.columns.nlevels == 1 and len(tickers) == 1 and 'Close' in data:
+            hist = data
+        else:
+            continue
         
-        # Return metrics
-        return {
-            "name": name,
-            "current_price": current_price,
-            "price_52wk_high": price_52wk_high,
-            "price_52wk_low": price_52wk_low,
-            "pe_ratio": pe_ratio,
-            "dividend_yield": dividend_yield,
-            "returns": {
-                "1mo": return_1mo,
-                "3mo": return_3mo,
-                "1yr": return_1yr
-            }
-        }
+        # Rows from other tickers' trading days are empty for this one
+        hist = hist[columns].dropna(subset=['Close'])
+        if not hist.empty:
+            histories[ticker] = hist
     
-    except Exception as e:
-        return {"error": f"Error getting stock metrics: {str(e)}"}
+    return histories
+
+def _latest_prices(tickers):
+    """
+    Get the latest closing price for each ticker with one batched download.
+    
+    Args:
+        tickers (list): Stock ticker symbols
+        
+    Returns:
+        dict: Latest closing price by ticker, for tickers that returned data
+    """
+    histories = _download_histories(tickers, period="1d", auto_adjust=False, columns=['Close'])
+    prices = {ticker: hist['Close'].iloc[-1] for ticker, hist in histories.items()}
+    
+    # Fall back to a per-ticker request for anything missing from the batch
+    for ticker in tickers:
+        if ticker not in prices:
+            hist = _ticker(ticker).history(period="1d", actions=False)
+            if not hist.empty:
+                prices[ticker] = hist['Close'].iloc[-1]
+    
+    return prices
 
 def calculate_portfolio_metrics(holdings):
     """
@@ -298,68 +726,66 @@ def calculate_portfolio_metrics(holdings):
     Returns:
         dict: Portfolio metrics
     """
-    try:
-        if not holdings:
-            return {
-                "total_value": 0,
-                "total_cost": 0,
-                "total_gain_loss": 0,
-                "total_gain_loss_pct": 0,
-                "holdings_data": []
-            }
-        
-        holdings_data = []
-        total_value = 0
-        total_cost = 0
-        
-        # Process each holding
-        for holding in holdings:
-            ticker = holding['ticker']
-            shares = holding['shares']
-            cost_basis = holding['cost_basis']
-            
-            # Get current price
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="1d")
-            
-            if hist.empty:
-                continue
-                
-            latest_price = hist['Close'].iloc[-1]
-            
-            # Calculate values
-            current_value = shares * latest_price
-            total_cost_basis = shares * cost_basis
-            gain_loss = current_value - total_cost_basis
-            gain_loss_pct = (gain_loss / total_cost_basis) * 100 if total_cost_basis > 0 else 0
-            
-            # Add to holdings data
-            holdings_data.append({
-                "ticker": ticker,
-                "shares": shares,
-                "cost_basis": cost_basis,
-                "latest_price": latest_price,
-                "current_value": current_value,
-                "gain_loss": gain_loss,
-                "gain_loss_pct": gain_loss_pct
-            })
-            
-            # Update totals
-            total_value += current_value
-            total_cost += total_cost_basis
-        
-        # Calculate portfolio totals
-        total_gain_loss = total_value - total_cost
-        total_gain_loss_pct = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0
-        
-        # Return metrics
+    if not holdings:
         return {
-            "total_value": total_value,
-            "total_cost": total_cost,
-            "total_gain_loss": total_gain_loss,
-            "total_gain_loss_pct": total_gain_loss_pct,
-            "holdings_data": holdings_data
+            "total_value": 0,
+            "total_cost": 0,
+            "total_gain_loss": 0,
+            "total_gain_loss_pct": 0,
+            "holdings_data": []
         }
     
+    # Get current prices for all holdings in one request
+    try:
+        prices = _latest_prices(list(dict.fromkeys(h['ticker'] for h in holdings)))
     except Exception as e:
-        return {"error": f"Error calculating portfolio metrics: {str(e)}"}
\ No newline at end of file
+        return {"error": f"Error calculating portfolio metrics: {str(e)}"}
+    
+    # Holdings without a current price are left out
+    priced = [holding for holding in holdings if holding['ticker'] in prices]
+    count = len(priced)
+    
+    # One array per field so every holding is valued at once
+    shares = np.fromiter((h['shares'] for h in priced), dtype=np.float64, count=count)
+    cost_basis = np.fromiter((h['cost_basis'] for h in priced), dtype=np.float64, count=count)
+    latest_price = np.fromiter((prices[h['ticker']] for h in priced), dtype=np.float64, count=count)
+    
+    # Calculate values
+    current_value = shares * latest_price
+    total_cost_basis = shares * cost_basis
+    gain_loss = current_value - total_cost_basis
+    has_cost = total_cost_basis > 0
+    gain_loss_pct = np.where(has_cost, gain_loss / np.where(has_cost, total_cost_basis, 1.0) * 100, 0.0)
+    
+    # Build holdings data
+    holdings_data = [
+        {
+            "ticker": holding['ticker'],
+            "shares": holding['shares'],
+            "cost_basis": holding['cost_basis'],
+            "latest_price": prices[holding['ticker']],
+            "current_value": value,
+            "gain_loss": gain,
+            "gain_loss_pct": gain_pct
+        }
+        for holding, value, gain, gain_pct in zip(
+            priced, current_value.tolist(), gain_loss.tolist(), gain_loss_pct.tolist()
+        )
+    ]
+    
+    # Calculate totals
+    total_value = float(current_value.sum())
+    total_cost = float(total_cost_basis.sum())
+    
+    # Calculate portfolio totals
+    total_gain_loss = total_value - total_cost
+    total_gain_loss_pct = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0
+    
+    # Return metrics
+    return {
+        "total_value": total_value,
+        "total_cost": total_cost,
+        "total_gain_loss": total_gain_loss,
+        "total_gain_loss_pct": total_gain_loss_pct,
+        "holdings_data": holdings_data
+    }
\ No newline at end of file